@@ -0,0 +1,188 @@
+"""
+Batch mode of Jade
+
+Analyzes all projects of a manifest in one run, e.g.
+
+    python batch.py manifest.json --output ./batch --workers 8
+
+The manifest is a JSON list of projects with a domain, a dot file (relative to the manifest)
+and optionally a deny list and a unique name (default: domain):
+
+    [
+        {"name": "cpachecker", "domain": "org.sosy_lab.cpachecker", "dotfile": "cpachecker.jar.dot",
+         "denylist": ["org.sosy_lab.cpachecker.util.test."]}
+    ]
+
+The data, graphs and report of each project are stored in <output>/<name>/{data,graphs,reports},
+a summary of all projects in <output>/summary.json and <output>/summary.md.
+"""
+
+import json
+import os
+
+from config import (
+    APPROXIMATE_EPSILON,
+    APPROXIMATE_SEED,
+    APPROXIMATE_THRESHOLD,
+    EXPORT_JSON,
+    PLOTS,
+    VECTORIZED,
+)
+
+
+def load_manifest(path: str) -> list:
+    """
+    Loads the projects of a manifest, the paths of the dot files are made absolute
+
+    Raises a ValueError if two projects have the same name (their output directory),
+    e.g. two projects of the same domain without a name
+    """
+
+    with open(path) as f:
+        projects = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(path))
+    names = set()
+
+    for project in projects:
+        project.setdefault("name", project["domain"])
+        project.setdefault("denylist", [])
+        project["dotfile"] = os.path.join(base, project["dotfile"])
+
+        if project["name"] in names:
+            raise ValueError(f"{path}: duplicate project name {project['name']!r}")
+        names.add(project["name"])
+
+    return projects
+
+
+def run_project(project: dict, output: str, plots: bool = PLOTS) -> dict:
+    """
+    Builds the dependency graph, calculates the measures and generates the report of a project
+    in the directory <output>/<name>
+
+    Returns the summary of the project
+    """
+
+    import measures
+    import pipeline
+
+    directory = os.path.join(os.path.abspath(output), project["name"])
+    for folder in ("data", "graphs", "reports"):
+        os.makedirs(os.path.join(directory, folder), exist_ok=True)
+
+    summary = {"name": project["name"], "domain": project["domain"], "dotfile": project["dotfile"]}
+
+    try:
+        dg = pipeline.build_graph(project["dotfile"], project["domain"], project["denylist"])
+
+        approximate = measures.Approximation(
+            APPROXIMATE_THRESHOLD, APPROXIMATE_EPSILON, APPROXIMATE_SEED
+        )
+        results = pipeline.calculate(dg, VECTORIZED, approximate=approximate)
+
+        # all files are written to the directory of the project
+        pipeline.store_graph(dg, EXPORT_JSON, directory)
+        pipeline.store_results(results, directory)
+        path = pipeline.report(
+            dg,
+            results,
+            project["domain"],
+            project["dotfile"],
+            project["denylist"],
+            plots,
+            output=directory,
+        )
+
+        values = results.values
+        summary["classes"] = len(dg)
+        summary["packages"] = len(values["noc"])
+        summary["dependencies"] = dg.num_edges()
+        summary["report"] = os.path.normpath(path)
+        summary["averages"] = {
+            m: sum(v.values()) / len(v) if v else 0 for m, v in values.items() if m != "approximated"
+        }
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+
+    return summary
+
+
+def _run(args: tuple) -> dict:
+    return run_project(*args)
+
+
+def write_summary(summaries: list, output: str) -> None:
+    """
+    Stores the summaries of all projects in <output>/summary.json and <output>/summary.md
+    """
+
+    from report import MEASURES, table
+
+    with open(os.path.join(output, "summary.json"), "w") as f:
+        json.dump(summaries, f, indent=4)
+
+    head = ("Project", "Classes", "Packages", "Dependencies") + tuple(
+        f"avg. {MEASURES[m].label}" for m in MEASURES
+    )
+    body = [
+        (s["name"], s["classes"], s["packages"], s["dependencies"])
+        + tuple(round(s["averages"].get(m, 0), 3) for m in MEASURES)
+        for s in summaries
+        if "error" not in s
+    ]
+
+    with open(os.path.join(output, "summary.md"), "w") as f:
+        f.write("# Summary\n")
+        f.writelines([l + "\n" for l in table(head, body)])
+
+        failed = [s for s in summaries if "error" in s]
+        if failed:
+            f.write("## Failed projects\n")
+            f.writelines([f"- {s['name']}: {s['error']}\n" for s in failed])
+
+
+def run(projects: list, output: str, workers: int = 1, plots: bool = PLOTS) -> list:
+    """
+    Analyzes all projects in a shared pool of worker processes
+    (each worker imports the measurement and plotting libraries only once)
+
+    Returns the summaries of the projects (in the order of the manifest)
+    """
+
+    os.makedirs(output, exist_ok=True)
+
+    tasks = [(project, output, plots) for project in projects]
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers) as pool:
+            summaries = list(pool.map(_run, tasks))
+    else:
+        summaries = [_run(task) for task in tasks]
+
+    write_summary(summaries, output)
+
+    return summaries
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze all projects of a manifest")
+    parser.add_argument("manifest")
+    parser.add_argument("--output", default="./batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-plots", action="store_true", help="only create the text reports")
+    args = parser.parse_args()
+
+    projects = load_manifest(args.manifest)
+    summaries = run(projects, args.output, args.workers, PLOTS and not args.no_plots)
+
+    failed = [s for s in summaries if "error" in s]
+    print(f"Analyzed {len(summaries) - len(failed)} of {len(summaries)} projects, see {args.output}")
+
+
+if __name__ == "__main__":
+    main()
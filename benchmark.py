@@ -0,0 +1,293 @@
+"""
+Benchmark suite for Jade
+
+Generates synthetic jdeps dot files at different scales and records the wall time
+and peak memory (tracemalloc) of each stage of the pipeline in a JSON file, e.g.
+
+    python benchmark.py --classes 1000 10000 100000 --output benchmark.json
+"""
+
+import bisect
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import cycles as cyc
+import depgraph
+import measures
+from graph import Graph, GRAPH_PATH
+
+DOMAIN = "org.bench"
+
+
+def generate_dotfile(
+    path: str,
+    classes: int = 1000,
+    depth: int = 4,
+    fanout: int = 5,
+    cycles: float = 0.05,
+    seed: int = 0,
+) -> None:
+    """
+    Writes the dot file of a synthetic project in the format of jdeps
+
+    - the packages form a tree of the given depth below DOMAIN (about 12 classes per package)
+    - each class has on average fanout dependencies, half of them within its own package
+    - dependencies point to classes created earlier (i.e. the graph is layered),
+      a fraction cycles of them points to classes created later and thereby creates cycles
+    - some classes are nested or tests, some dependencies point to JDK classes or are not found
+    """
+
+    rnd = random.Random(seed)
+
+    # package tree
+    packages = [(DOMAIN, 0)]
+    for i in range(1, max(1, classes // 12)):
+        parent, d = rnd.choice([p for p in packages[-50:] if p[1] < depth] or packages[:1])
+        packages.append((f"{parent}.p{i}", d + 1))
+
+    # classes (index in the list of all classes, package members in order of creation)
+    names = []
+    pkg_of = []
+    members = [[] for _ in packages]
+
+    for i in range(classes):
+        if names and rnd.random() < 0.05:
+            p = pkg_of[-1]
+            name = f"{names[-1]}${i}"
+        else:
+            p = rnd.randrange(len(packages))
+            name = f"{packages[p][0]}.C{i}" + ("Test" if rnd.random() < 0.01 else "")
+
+        names.append(name)
+        pkg_of.append(p)
+        members[p].append(i)
+
+    external = [
+        "java.lang.Object (java.base)",
+        "java.util.List (java.base)",
+        "javax.Missing (not found)",
+    ]
+
+    with open(path, "w") as dotfile:
+        dotfile.write('digraph "bench.jar" {\n')
+        dotfile.write("    // Path: bench.jar\n")
+
+        for i, c in enumerate(names):
+            source = f'"{c}"'
+            local = members[pkg_of[i]]
+            pos = bisect.bisect_left(local, i)
+
+            for _ in range(rnd.randint(0, 2 * fanout)):
+                forward = rnd.random() < cycles
+
+                if rnd.random() < 0.1:
+                    d = rnd.choice(external)
+                else:
+                    if rnd.random() < 0.5:
+                        # within the package
+                        if forward:
+                            j = local[rnd.randrange(pos, len(local))]
+                        else:
+                            j = local[rnd.randrange(pos + 1)]
+                    else:
+                        j = rnd.randrange(i, classes) if forward else rnd.randrange(i + 1)
+
+                    d = names[j] + (" (bench.jar)" if rnd.random() < 0.5 else "")
+
+                dotfile.write(f'   {source:<50} -> "{d}";\n')
+
+        dotfile.write("}\n")
+
+
+class Stages:
+    """
+    Records the wall time and the peak memory of stages
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.results = {}
+
+    def run(self, name: str, f, *args):
+        """
+        Runs f(*args) as stage name and returns its result
+        """
+
+        if self.memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        result = f(*args)
+        wall = time.perf_counter() - start
+
+        self.results[name] = {"wall": wall}
+
+        if self.memory:
+            self.results[name]["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        print(f"  {name}: {wall:.3f}s")
+
+        return result
+
+
+def run(
+    classes: int,
+    depth: int = 4,
+    fanout: int = 5,
+    cycles: float = 0.05,
+    seed: int = 0,
+    memory: bool = True,
+    report: bool = True,
+    plots: bool = False,
+) -> dict:
+    """
+    Runs the benchmark for a synthetic project with the given number of classes
+    """
+
+    cwd = os.getcwd()
+    stages = Stages(memory)
+    valid = depgraph.validator(DOMAIN, [])
+
+    try:
+        import numpy, scipy
+
+        dcm = measures.dcm_matrix
+    except ImportError:
+        dcm = lambda c: (measures.dcm_lcom3(c), measures.dcm_sim(c), measures.dcm_cc(c))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bench.jar.dot")
+        generate_dotfile(path, classes, depth, fanout, cycles, seed)
+
+        # dependency graph
+        raw_deps = stages.run("depgraph.parse", depgraph.parse, path)
+        refined_deps = stages.run("depgraph.refine_deps", depgraph.refine_deps, raw_deps, valid)
+        graph_classes = stages.run("depgraph.get_classes", depgraph.get_classes, raw_deps, valid)
+        dg = stages.run("depgraph.build", depgraph.build, graph_classes, refined_deps)
+        del raw_deps, refined_deps, graph_classes
+
+        stages.run(
+            "depgraph.build_streaming",
+            lambda: depgraph.build_streaming(depgraph.iter_deps(path), valid),
+        )
+        g = stages.run("graph.from_dict", Graph.from_dict, dg)
+        del dg
+
+        # measures
+        packages = stages.run("measures.group_by_package", measures.group_by_package, g)
+
+        stages.run(
+            "measures.noc", lambda: {p: measures.noc(c) for p, c in packages.items()}
+        )
+        stages.run("measures.coupling", measures.coupling, packages, g)
+        stages.run(
+            "measures.dcm",
+            lambda: {p: dcm([set(g[c]) for c in cs]) for p, cs in packages.items()},
+        )
+        stages.run("measures.pdd_all", measures.pdd_all, packages, g)
+        stages.run("measures.dlm_all", measures.dlm_all, packages, g)
+        rollup = stages.run("measures.rollup", measures.rollup, packages, g)
+        stages.run("cycles.calc", cyc.calc, g)
+        results = stages.run("measures.calc_packages", measures.calc_packages, g, packages)
+
+        # report
+        if report:
+            import report as rep
+
+            os.chdir(workdir)
+            try:
+                for folder in ("data", "graphs", "reports"):
+                    os.mkdir(folder)
+
+                g.save(GRAPH_PATH)
+                measures.store(results)
+                measures.store_rollup(rollup)
+
+                rep.unload()
+                stages.run("report.generate", rep.generate, plots)
+                rep.unload()
+            finally:
+                os.chdir(cwd)
+
+    return {
+        "classes": classes,
+        "depth": depth,
+        "fanout": fanout,
+        "cycles": cycles,
+        "seed": seed,
+        "graph": {"classes": len(g), "packages": len(packages), "edges": g.num_edges()},
+        "stages": stages.results,
+    }
+
+
+def _commit() -> str:
+    import subprocess
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    import argparse
+    import platform
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Benchmark Jade on synthetic jdeps graphs")
+    parser.add_argument("--classes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--depth", type=int, default=4, help="maximal depth of the package tree")
+    parser.add_argument("--fanout", type=int, default=5, help="average dependencies per class")
+    parser.add_argument("--cycles", type=float, default=0.05, help="fraction of backward dependencies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="do not trace memory (faster)")
+    parser.add_argument("--no-report", action="store_true", help="skip report.generate")
+    parser.add_argument("--plots", action="store_true", help="render the graphs of the report")
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    runs = []
+
+    for classes in args.classes:
+        print(f"Benchmarking {classes} classes...")
+        runs.append(
+            run(
+                classes,
+                args.depth,
+                args.fanout,
+                args.cycles,
+                args.seed,
+                memory=not args.no_memory,
+                report=not args.no_report,
+                plots=args.plots,
+            )
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "commit": _commit(),
+                "python": platform.python_version(),
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "memory": not args.no_memory,
+                "runs": runs,
+            },
+            f,
+            indent=4,
+        )
+
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
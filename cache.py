@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+
+# keys and results of the stages of the last run
+CACHE_PATH = "./data/cache.json"
+
+
+def file_hash(path: str) -> str:
+    """
+    Returns the SHA-256 hash of the content of a file (empty if the file does not exist)
+    """
+
+    if not os.path.exists(path):
+        return ""
+
+    h = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+    return h.hexdigest()
+
+
+def code_hash(*modules) -> str:
+    """
+    Returns the hash of the source files of the given modules
+    """
+
+    return key(*[file_hash(m.__file__) for m in modules])
+
+
+def key(*parts) -> str:
+    """
+    Returns the hash of the given JSON serializable parts (e.g. hashes and settings)
+    """
+
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class Cache:
+    """
+    Memoizes the stages of the pipeline
+
+    Each stage is stored with a key (the hash of its inputs, cf. key), the files it created
+    and its (JSON serializable) result. A stage whose key is unchanged and whose files
+    still exist is skipped and its previous result is returned.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.hits = set()
+
+        try:
+            with open(path) as f:
+                self.stages = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.stages = {}
+
+    def fresh(self, name: str, key: str) -> bool:
+        """
+        Returns true if stage name was run with the given key and its files still exist
+        """
+
+        stage = self.stages.get(name)
+
+        return (
+            stage is not None
+            and stage["key"] == key
+            and all(os.path.exists(f) for f in stage["outputs"])
+        )
+
+    def run(self, name: str, key: str, outputs, f):
+        """
+        Returns the result of stage name, f() is only called if the stage is not fresh
+
+        outputs are the files created by the stage, it may be a function of the result
+        """
+
+        if self.fresh(name, key):
+            self.hits.add(name)
+            return self.stages[name]["result"]
+
+        # the stage is invalid until it is complete
+        self.stages.pop(name, None)
+        self.save()
+
+        result = f()
+
+        self.stages[name] = {
+            "key": key,
+            "outputs": outputs(result) if callable(outputs) else list(outputs),
+            "result": result,
+        }
+        self.save()
+
+        return result
+
+    def save(self) -> None:
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.stages, f, indent=4)
+
+        os.replace(self.path + ".tmp", self.path)
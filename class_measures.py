@@ -0,0 +1,208 @@
+"""
+Class level measures of Jade
+
+- fan-in: number of other classes depending directly on the class
+- fan-out: number of other classes the class depends on directly
+- dependencies: number of other classes the class depends on transitively
+- dependents: number of other classes depending transitively on the class
+
+The transitive sizes are calculated once per strongly connected component of the condensed graph
+(cf. scc.condense), exactly with reachability bitsets or, for huge graphs, estimated with
+HyperLogLog sketches.
+"""
+
+import json
+import os
+
+CLASSES_PATH = "./data/classes.json"
+
+# graphs with more strongly connected components are measured with sketches by default
+EXACT_LIMIT = 50000
+
+KEYS = ("fan_in", "fan_out", "dependencies", "dependents")
+
+
+def fan(depgraph: dict) -> tuple:
+    """
+    Calculates fan-in and fan-out of all classes (self-dependencies are ignored)
+
+    Returns a tuple of dicts (fan_in, fan_out)
+    """
+
+    fan_in = dict.fromkeys(depgraph, 0)
+    fan_out = {}
+
+    for c, deps in depgraph.items():
+        targets = set(deps)
+        targets.discard(c)
+        fan_out[c] = len(targets)
+
+        for d in targets:
+            fan_in[d] = fan_in.get(d, 0) + 1
+
+    return fan_in, fan_out
+
+
+def _predecessors(dag: list) -> list:
+    preds = [[] for _ in dag]
+
+    for i, succ in enumerate(dag):
+        for j in succ:
+            preds[j].append(i)
+
+    return preds
+
+
+def _exact_sizes(cond, dag: list, order) -> list:
+    # number of classes in the components reachable from each component (including itself),
+    # order must visit the successors (in dag) of a component before the component
+    import scc
+
+    weight = [len(m) for m in cond.members]
+    if scc.np is not None:
+        weight = scc.np.asarray(weight, dtype=scc.np.int64)
+
+    reach = [0] * len(dag)
+    sizes = [0] * len(dag)
+
+    for i in order:
+        r = 1 << i
+        for j in dag[i]:
+            r |= reach[j]
+        reach[i] = r
+        sizes[i] = scc.reached_weight(r, weight)
+
+    return sizes
+
+
+def _hash(x: int) -> int:
+    # splitmix64
+    x = (x + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+
+def _sketch_sizes(cond, dag: list, order, precision: int) -> list:
+    # HyperLogLog estimate of the number of classes reachable from each component,
+    # the sketch of a component is the register-wise maximum of the sketches of its successors
+    import numpy as np
+
+    m = 1 << precision
+    registers = np.zeros((len(dag), m), dtype=np.uint8)
+
+    # register index and rank of each class
+    items = []
+    uid = 0
+    for comp in cond.members:
+        idx, ranks = [], []
+        for _ in comp:
+            h = _hash(uid)
+            uid += 1
+            rest = h & ((1 << (64 - precision)) - 1)
+            idx.append(h >> (64 - precision))
+            ranks.append(64 - precision - rest.bit_length() + 1)
+        items.append((np.asarray(idx), np.asarray(ranks, dtype=np.uint8)))
+
+    for i in order:
+        if dag[i]:
+            registers[i] = registers[list(dag[i])].max(axis=0)
+
+        idx, ranks = items[i]
+        np.maximum.at(registers[i], idx, ranks)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimates = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+
+    # linear counting for small cardinalities
+    zeros = (registers == 0).sum(axis=1)
+    small = (estimates <= 2.5 * m) & (zeros > 0)
+    estimates[small] = m * np.log(m / zeros[small])
+
+    return np.rint(estimates).astype(np.int64).tolist()
+
+
+def closure_sizes(depgraph: dict, cond=None, sketch: bool = False, precision: int = 10) -> tuple:
+    """
+    Calculates the number of classes each class depends on transitively and
+    the number of classes depending transitively on it (both without the class itself)
+
+    The sizes are calculated once per strongly connected component (cond, default: scc.condense)
+    in one pass over the condensed graph in (reverse) topological order.
+    With sketch, the sizes are estimated with HyperLogLog sketches with 2^precision registers
+    per component (relative error about 1.04 / sqrt(2^precision), requires NumPy)
+    instead of exact reachability bitsets.
+    Returns a tuple of dicts (dependencies, dependents)
+    """
+
+    import scc
+
+    cond = cond or scc.condense(depgraph)
+    n = len(cond.dag)
+    sizes = _sketch_sizes if sketch else _exact_sizes
+    args = (precision,) if sketch else ()
+
+    # successors have smaller ids, predecessors larger ones
+    forward = sizes(cond, cond.dag, range(n), *args)
+    backward = sizes(cond, _predecessors(cond.dag), range(n - 1, -1, -1), *args)
+
+    dependencies = {}
+    dependents = {}
+
+    for i, comp in enumerate(cond.members):
+        for c in comp:
+            dependencies[c] = max(forward[i] - 1, 0)
+            dependents[c] = max(backward[i] - 1, 0)
+
+    return dependencies, dependents
+
+
+def calc(depgraph: dict, sketch: bool = None, cond=None) -> dict:
+    """
+    Calculates the class level measures of all classes of the dependency graph
+
+    By default, sketches are used for graphs with more than EXACT_LIMIT strongly connected components
+    (if NumPy is installed, cf. closure_sizes), cond is the condensed graph (default: scc.condense).
+    Returns a dict mapping each class to a tuple (fan-in, fan-out, dependencies, dependents)
+    """
+
+    import scc
+
+    cond = cond or scc.condense(depgraph)
+
+    if sketch is None:
+        sketch = scc.np is not None and len(cond.members) > EXACT_LIMIT
+
+    fan_in, fan_out = fan(depgraph)
+    dependencies, dependents = closure_sizes(depgraph, cond, sketch)
+
+    return {
+        c: (fan_in[c], fan_out[c], dependencies[c], dependents[c])
+        for c in depgraph
+    }
+
+
+def _path(directory: str = None) -> str:
+    return os.path.join(directory, os.path.basename(CLASSES_PATH)) if directory else CLASSES_PATH
+
+
+def store(values: dict, directory: str = None) -> None:
+    """
+    Stores the class level measures under CLASSES_PATH or, if directory is given,
+    under <directory>/classes.json
+    """
+
+    with open(_path(directory), "w") as f:
+        json.dump({c: dict(zip(KEYS, v)) for c, v in values.items()}, f, indent=4)
+
+
+def clear(directory: str = None) -> None:
+    """
+    Removes the class level measures of a previous run (if they are not calculated in this run),
+    directory as in store
+    """
+
+    path = _path(directory)
+
+    if os.path.exists(path):
+        os.remove(path)
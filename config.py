@@ -7,6 +7,60 @@ DOTFILE_PATH = ""
 # List of paths for which all classes starting with the path should be ignored
 DENYLIST = []
 
+# Additionally store the dependency graph as JSON (./data/depgraph.json),
+# the measures and the report use the binary graph file ./data/depgraph.bin
+EXPORT_JSON = True
+
+# Storage of the dependency graph: "memory" or "sqlite" for graphs that do not fit in memory
+# (streamed into ./data/depgraph.db, the measures are calculated with SQL queries;
+# INCREMENTAL, WORKERS and EXPORT_JSON are not supported)
+BACKEND = "memory"
+
+# Only recalculate the packages affected by the changes since the previous run
+# (falls back to a full calculation if there are no results of a previous run
+# or they were calculated with other settings or code)
+INCREMENTAL = False
+
+# Number of worker processes calculating the measures and rendering the graphs (1 = no parallelism)
+WORKERS = 1
+
+# Calculate the dependency cohesion measures with NumPy/SciPy
+# (falls back to pure Python if set to False or if NumPy/SciPy are not installed)
+VECTORIZED = True
+
+# Estimate DCM (LCOM3) and DCM (SIM) of packages with more than APPROXIMATE_THRESHOLD classes
+# (None = always calculate the exact values, requires NumPy), with a probability of 95% the estimates
+# deviate by at most APPROXIMATE_EPSILON (per pair of classes); APPROXIMATE_SEED makes them reproducible
+APPROXIMATE_THRESHOLD = None
+APPROXIMATE_EPSILON = 0.05
+APPROXIMATE_SEED = 0
+
+# Create the graphs of the report (requires matplotlib, seaborn and pandas)
+PLOTS = True
+
+# Depth (below the domain) of the packages whose measures are listed in the report
+# including all their subpackages (None = no listing, cf. ./data/rollup.json)
+ROLLUP_DEPTH = 1
+
+# Calculate fan-in, fan-out and the transitive dependencies and dependents of each class
+# (./data/classes.json, not with the SQLite backend)
+CLASS_MEASURES = True
+
+# Skip the stages whose inputs (dot file, settings, intermediate results and code)
+# did not change since the previous run (cf. ./data/cache.json)
+CACHE = True
+
+# Store wall time, CPU time, growth of the peak RSS, peak RSS of the process so far and number
+# of items of each stage and the time and number of measured packages per measure next to the report (./reports/<report> - metrics.json,
+# ./reports/<domain> - <date> (cached) - metrics.json if the report of a previous run is reused)
+METRICS = True
+
+# Record the peak memory allocated during each stage with tracemalloc (slows down the run)
+TRACEMALLOC = False
+
+# Profile the run with cProfile (statistics are stored next to the metrics, *.prof)
+PROFILE = False
+
 
 # Example
 # DOMAIN = "org.sosy_lab.cpachecker"
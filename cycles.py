@@ -0,0 +1,246 @@
+"""
+Dependency cycles of Jade
+
+- class cycles: strongly connected components of the class dependency graph
+- package cycles: strongly connected components of the package graph (p depends on q if
+  a class of p depends on a class of q, weighted with the number of these class dependencies)
+- breaking edges: a minimal set of package dependencies whose removal breaks all cycles
+  of a package cycle
+
+Only cycles of at least two classes or packages are reported. The components are determined
+iteratively in linear time (cf. scc.components).
+"""
+
+import heapq
+import json
+import os
+from collections import namedtuple
+
+CYCLES_PATH = "./data/cycles.json"
+
+# classes: class cycles (lists of classes, largest first)
+# packages: package cycles (lists of packages, largest first)
+# breaking: for each package cycle, list of edges (p, q, number of class dependencies)
+# size: package -> (number of packages of its package cycle, number of its classes in class cycles)
+Cycles = namedtuple("Cycles", ["classes", "packages", "breaking", "size"])
+
+
+def package_graph(depgraph: dict, pkg_of=None) -> dict:
+    """
+    Builds the package graph of the dependency graph (dependencies within a package are ignored)
+
+    pkg_of maps each class to its package (default: the prefix of the class name).
+    Returns a dict mapping each package to a dict (package it depends on -> number of class dependencies)
+    """
+
+    pkg_of = pkg_of or (lambda c: c.rpartition(".")[0])
+    graph = {}
+
+    for c, deps in depgraph.items():
+        p = pkg_of(c)
+        targets = graph.setdefault(p, {})
+
+        for d in deps:
+            q = pkg_of(d)
+            if q != p:
+                targets[q] = targets.get(q, 0) + 1
+
+    return graph
+
+
+def _order(nodes: list, succ: dict) -> list:
+    # ordering of the nodes with few (weighted) backward edges (Eades, Lin and Smyth):
+    # sinks are placed at the end, sources at the beginning and otherwise the node
+    # with the highest difference of outgoing and incoming weight
+    pred = {v: {} for v in nodes}
+    for v in nodes:
+        for w, weight in succ[v].items():
+            pred[w][v] = weight
+
+    out = {v: sum(succ[v].values()) for v in nodes}
+    inc = {v: sum(pred[v].values()) for v in nodes}
+
+    def key(v):
+        # sinks first, then sources, then the highest difference
+        return (0 if out[v] == 0 else 1 if inc[v] == 0 else 2, inc[v] - out[v], v)
+
+    remaining = set(nodes)
+    heap = [key(v) for v in nodes]
+    heapq.heapify(heap)
+
+    left, right = [], []
+
+    while heap:
+        k = heapq.heappop(heap)
+        v = k[-1]
+        if v not in remaining or k != key(v):
+            continue
+
+        if out[v] == 0:
+            right.append(v)
+        else:
+            left.append(v)
+
+        remaining.discard(v)
+        for u, weight in pred[v].items():
+            if u in remaining:
+                out[u] -= weight
+                heapq.heappush(heap, key(u))
+        for w, weight in succ[v].items():
+            if w in remaining:
+                inc[w] -= weight
+                heapq.heappush(heap, key(w))
+
+    return left + right[::-1]
+
+
+def _restore(kept: dict, pred: dict, position: dict, v, w) -> bool:
+    # adds the edge v -> w (position[w] < position[v]) to the acyclic graph of the kept edges
+    # unless it closes a cycle, i.e. unless v is reachable from w, and then moves the nodes
+    # so that the positions stay a topological order (Pearce and Kelly):
+    # the nodes reachable from w and the nodes reaching v are searched alternately,
+    # only nodes between w and v are visited
+    low, high = position[w], position[v]
+
+    forward, backward = [], []
+    forward_seen, backward_seen = {w}, {v}
+    forward_stack, backward_stack = [w], [v]
+
+    while forward_stack or backward_stack:
+        if forward_stack:
+            x = forward_stack.pop()
+            forward.append(x)
+            for y in kept[x]:
+                if y in backward_seen:
+                    return False
+                if y not in forward_seen and position[y] < high:
+                    forward_seen.add(y)
+                    forward_stack.append(y)
+
+        if backward_stack:
+            x = backward_stack.pop()
+            backward.append(x)
+            for y in pred[x]:
+                if y in forward_seen:
+                    return False
+                if y not in backward_seen and position[y] > low:
+                    backward_seen.add(y)
+                    backward_stack.append(y)
+
+    # the nodes reaching v are placed before the nodes reachable from w
+    nodes = sorted(backward, key=position.get) + sorted(forward, key=position.get)
+    for x, i in zip(nodes, sorted(position[x] for x in nodes)):
+        position[x] = i
+
+    kept[v].add(w)
+    pred[w].add(v)
+
+    return True
+
+
+def breaking_edges(graph: dict, component: list) -> list:
+    """
+    Determines a minimal set of edges whose removal makes the subgraph of the component
+    (e.g. a package cycle) acyclic
+
+    The edges pointing backwards in a greedy ordering of the component with few (weighted)
+    backward edges (determined in O(E log V)) break all cycles. Then the backward edges are
+    restored, heaviest first, unless they close a cycle with the kept edges, so that each of the
+    remaining edges closes a cycle if restored (the set is minimal, but not necessarily of minimum
+    weight, finding the latter is NP-hard).
+    Returns a list of edges (source, target, weight), heaviest first
+    """
+
+    members = set(component)
+    succ = {v: {w: n for w, n in graph.get(v, {}).items() if w in members} for v in component}
+
+    order = _order(component, succ)
+    position = {v: i for i, v in enumerate(order)}
+
+    backward = [
+        (v, w, n) for v in component for w, n in succ[v].items() if position[w] <= position[v]
+    ]
+
+    kept = {v: {w for w in succ[v] if position[w] > position[v]} for v in component}
+    pred = {v: set() for v in component}
+    for v in component:
+        for w in kept[v]:
+            pred[w].add(v)
+
+    # nodes reachable via the forward edges (bitsets of the initial positions):
+    # edges closing a cycle with these are not restored without a search
+    reach = {}
+    for v in reversed(order):
+        r = 1 << position[v]
+        for w in kept[v]:
+            r |= reach[w]
+        reach[v] = r
+
+    initial = dict(position)
+
+    return [
+        (v, w, n)
+        for v, w, n in sorted(backward, key=lambda e: -e[2])
+        if v == w or reach[w] >> initial[v] & 1 or not _restore(kept, pred, position, v, w)
+    ]
+
+
+def calc(depgraph: dict, pkg_of=None, matrix=None, cond=None) -> Cycles:
+    """
+    Determines the class and package cycles of the dependency graph
+    and the edges breaking each package cycle (pkg_of cf. package_graph)
+
+    If the package dependency matrix of the graph is given (cf. package_matrix.PackageMatrix),
+    the package graph is read from it, the class cycles are read from the condensed
+    dependency graph cond (cf. scc.condense) if given.
+    """
+
+    import scc
+
+    pkg_of = pkg_of or (lambda c: c.rpartition(".")[0])
+    graph = matrix.to_dict() if matrix is not None else package_graph(depgraph, pkg_of)
+
+    def cycles(members):
+        return sorted((sorted(m) for m in members if len(m) > 1), key=len, reverse=True)
+
+    classes = cycles(cond.members if cond is not None else scc.components(depgraph)[1])
+    packages = cycles(scc.components(graph)[1])
+    breaking = [breaking_edges(graph, comp) for comp in packages]
+
+    size = {p: [0, 0] for p in graph}
+
+    for comp in packages:
+        for p in comp:
+            size[p][0] = len(comp)
+
+    for comp in classes:
+        for c in comp:
+            size[pkg_of(c)][1] += 1
+
+    return Cycles(classes, packages, breaking, {p: tuple(s) for p, s in size.items()})
+
+
+def as_dict(cycles: Cycles) -> dict:
+    """
+    Returns the JSON serializable form of the cycles (as stored in CYCLES_PATH)
+    """
+
+    return {
+        "classes": cycles.classes,
+        "packages": [
+            {"packages": comp, "breaking": [list(e) for e in edges]}
+            for comp, edges in zip(cycles.packages, cycles.breaking)
+        ],
+        "size": {p: {"cycle": s, "classes": n} for p, (s, n) in cycles.size.items()},
+    }
+
+
+def store(cycles: Cycles, directory: str = None) -> None:
+    """
+    Stores the cycles under CYCLES_PATH or, if directory is given, under <directory>/cycles.json
+    """
+
+    path = os.path.join(directory, os.path.basename(CYCLES_PATH)) if directory else CYCLES_PATH
+
+    with open(path, "w") as f:
+        json.dump(as_dict(cycles), f, indent=4)
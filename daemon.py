@@ -0,0 +1,288 @@
+"""
+Watch mode of Jade
+
+Keeps the dependency graph and the measurement values in memory, watches the dot file
+and serves the measures over a local HTTP/JSON endpoint, e.g.
+
+    python daemon.py --port 8765
+
+    GET /status                     dot file, number of classes and packages, time of the last update,
+                                    whether the last update failed (+ error)
+    GET /packages                   names of all packages
+    GET /packages/<package>         all measurement values of a package
+    GET /packages/<package>/dependencies   packages the package depends on (+ number of class dependencies)
+    GET /packages/<package>/dependents     packages depending on the package (+ number of class dependencies)
+    GET /measures                   names of all measures
+    GET /measures/<m>?top=10&asc    packages ranked by measure m (default: highest first)
+
+When the dot file changes, only the affected packages are recalculated (cf. incremental.update).
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from config import DENYLIST, DOMAIN, DOTFILE_PATH, VECTORIZED
+
+
+class Session:
+    """
+    Dependency graph and measurement values of the watched dot file
+    """
+
+    def __init__(
+        self,
+        dotfile: str = DOTFILE_PATH,
+        domain: str = DOMAIN,
+        denylist: list = DENYLIST,
+        vectorized: bool = VECTORIZED,
+    ):
+        self.dotfile = dotfile
+        self.domain = domain
+        self.denylist = denylist
+        self.vectorized = vectorized
+
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.depgraph = None
+        self.values = None
+        self.matrix = None
+        self.updated = None
+        self.duration = None
+        self.affected = None
+        self.error = None
+
+        self._ranked = {}
+
+    def _stamp(self) -> tuple:
+        stat = os.stat(self.dotfile)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> bool:
+        """
+        Rebuilds the dependency graph if the dot file changed since the last refresh
+        and recalculates the measures of the affected packages
+
+        Returns true if the dot file changed
+        """
+
+        import incremental
+        import measures
+        import pipeline
+        from package_matrix import PackageMatrix
+
+        stamp = self._stamp()
+        if stamp == self.stamp:
+            return False
+
+        start = time.perf_counter()
+        depgraph = pipeline.build_graph(self.dotfile, self.domain, self.denylist)
+
+        if self.depgraph is None:
+            values = measures.calc_packages(
+                depgraph,
+                measures.group_by_package(depgraph),
+                vectorized=self.vectorized,
+                names=list(measures.MEASURES) + ["package_matrix"],
+            )
+            matrix = values.pop("package_matrix")
+            affected = set(values["noc"])
+        else:
+            # the values being served are not modified
+            values = {m: dict(v) for m, v in self.values.items()}
+            direct, transitive = incremental.update(
+                values, self.depgraph, depgraph, vectorized=self.vectorized
+            )
+            affected = direct | transitive
+            matrix = PackageMatrix.build(depgraph)
+
+        with self.lock:
+            self.stamp = stamp
+            self.depgraph = depgraph
+            self.values = values
+            self.matrix = matrix
+            self.affected = sorted(affected)
+            self.updated = time.time()
+            self.duration = time.perf_counter() - start
+            self.error = None
+            self._ranked = {}
+
+        return True
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "dotfile": self.dotfile,
+                "classes": len(self.depgraph),
+                "packages": len(self.values["noc"]),
+                "updated": self.updated,
+                "duration": self.duration,
+                "affected": len(self.affected),
+                "failing": self.error is not None,
+                "error": self.error,
+            }
+
+    def packages(self) -> list:
+        with self.lock:
+            return sorted(self.values["noc"])
+
+    def measures(self) -> list:
+        with self.lock:
+            return list(self.values)
+
+    def package(self, p: str) -> dict:
+        """
+        Returns all measurement values of package p (KeyError if it does not exist)
+        """
+
+        with self.lock:
+            if p not in self.values["noc"]:
+                raise KeyError(p)
+
+            return {m: values[p] for m, values in self.values.items()}
+
+    def neighbours(self, p: str, dependents: bool = False) -> dict:
+        """
+        Returns the packages package p depends on or, if dependents is set, the packages depending
+        on p with the number of class dependencies (KeyError if p does not exist)
+        """
+
+        with self.lock:
+            matrix = self.matrix
+
+        return matrix.dependents(p) if dependents else matrix.dependencies(p)
+
+    def ranked(self, m: str, top: int = None, ascending: bool = False) -> list:
+        """
+        Returns the (package, value) pairs of measure m sorted by value (KeyError if m does not exist)
+
+        Each measure is sorted only once per update
+        """
+
+        with self.lock:
+            if m not in self._ranked:
+                self._ranked[m] = sorted(self.values[m].items(), key=lambda i: i[1])
+
+            pairs = self._ranked[m]
+
+        if not ascending:
+            pairs = pairs[::-1]
+
+        return pairs[:top] if top is not None else pairs
+
+
+def watch(session: Session, interval: float = 1.0, stop: threading.Event = None) -> None:
+    """
+    Refreshes the session whenever the dot file changed (polled every interval seconds)
+    until stop is set
+
+    A failed update is logged and kept as the error of the session (cf. status),
+    the previous values are served until an update succeeds.
+    """
+
+    import traceback
+
+    stop = stop or threading.Event()
+
+    while not stop.wait(interval):
+        try:
+            if session.refresh():
+                print(f"Updated {len(session.affected)} packages in {session.duration:.3f}s")
+        except Exception as e:
+            # e.g. the dot file is being rewritten, retry on the next poll
+            traceback.print_exc()
+            with session.lock:
+                session.error = f"{type(e).__name__}: {e}"
+
+
+def handler(session: Session):
+    """
+    Creates the request handler serving the measures of the session
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, data, status: int = 200) -> None:
+            body = json.dumps(data).encode()
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [unquote(p) for p in url.path.strip("/").split("/")]
+            query = parse_qs(url.query, keep_blank_values=True)
+
+            try:
+                if parts == ["status"]:
+                    self.send_json(session.status())
+                elif parts == ["packages"]:
+                    self.send_json(session.packages())
+                elif len(parts) == 2 and parts[0] == "packages":
+                    self.send_json(session.package(parts[1]))
+                elif len(parts) == 3 and parts[0] == "packages" and parts[2] == "dependencies":
+                    self.send_json(session.neighbours(parts[1]))
+                elif len(parts) == 3 and parts[0] == "packages" and parts[2] == "dependents":
+                    self.send_json(session.neighbours(parts[1], dependents=True))
+                elif parts == ["measures"]:
+                    self.send_json(session.measures())
+                elif len(parts) == 2 and parts[0] == "measures":
+                    top = int(query["top"][0]) if "top" in query else None
+                    self.send_json(session.ranked(parts[1], top, "asc" in query))
+                else:
+                    self.send_json({"error": f"unknown path {url.path}"}, 404)
+            except KeyError as e:
+                self.send_json({"error": f"unknown package or measure {e}"}, 404)
+            except ValueError as e:
+                self.send_json({"error": str(e)}, 400)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(session: Session, host: str = "127.0.0.1", port: int = 8765, interval: float = 1.0) -> None:
+    """
+    Serves the measures of the session until interrupted,
+    the dot file is watched in a background thread
+    """
+
+    if session.depgraph is None:
+        session.refresh()
+
+    stop = threading.Event()
+    threading.Thread(target=watch, args=(session, interval, stop), daemon=True).start()
+
+    with ThreadingHTTPServer((host, port), handler(session)) as server:
+        print(f"Serving measures of {session.dotfile} on http://{host}:{server.server_port}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve live measures of the configured project")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between checks of the dot file"
+    )
+    args = parser.parse_args()
+
+    serve(Session(), args.host, args.port, args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,141 @@
+import re
+
 from config import DOMAIN, DOTFILE_PATH, DENYLIST
 
-def is_valid(c: str) -> bool:
+# A dependency of the dot file, e.g.
+#    "a.b.C"    -> "a.d.E (x.jar)";
+# all other lines (digraph syntax elements, comments, attributes) do not match
+EDGE_PATTERN = re.compile(
+    r'\s*"([\w._$-]*)"\s*->\s*"([\w.$_]*)(\s*\([a-zA-Z.\s]*\)\s*)?";'
+)
+
+
+def _prefix_pattern(prefixes: list) -> str:
     """
-    Check if class c is valid
+    Creates a regular expression matching any of the given prefixes
 
-    Returns true if c is within the domain, does not end on "Test",
-    is not "package-info" and should not be ignored according to the deny  list
+    The prefixes are merged into a trie first, so shared prefixes are matched only once
+    (e.g. ["a.b.", "a.c."] => "a\\.(?:b\\.|c\\.)")
     """
 
-    in_denylist = lambda x: len([p for p in DENYLIST if x.startswith(p)]) > 0
+    trie = {}
+
+    for p in prefixes:
+        node = trie
+        for ch in p:
+            # a shorter prefix already matches p
+            if None in node:
+                break
+            node = node.setdefault(ch, {})
+        else:
+            # p matches all longer prefixes
+            node.clear()
+            node[None] = True
+
+    def to_regex(node):
+        if None in node:
+            return ""
+
+        alternatives = [re.escape(ch) + to_regex(child) for ch, child in sorted(node.items())]
 
-    return (
-        c.startswith(DOMAIN)
-        and not c.endswith("Test")
-        and not c.endswith("package-info")
-        and not in_denylist(c)
-    )
+        if len(alternatives) == 1:
+            return alternatives[0]
 
+        return "(?:" + "|".join(alternatives) + ")"
 
-def parse() -> dict:
+    return to_regex(trie)
+
+
+def validator(domain: str, denylist: list):
     """
-    Parses the dependencies of a directed graph stored in a dot file
+    Creates the validation function for the given domain and deny list
+
+    The deny list is compiled once into a single anchored pattern
+    and the result is memoized per class name
     """
 
-    import re
+    from functools import lru_cache
 
-    PATTERN = r'\s*"([\w._$-]*)"\s*->\s*"([\w.$_]*)(\s*\([a-zA-Z.\s]*\)\s*)?";'
+    denied = re.compile(_prefix_pattern(denylist)).match if denylist else lambda x: False
 
-    with open(DOTFILE_PATH) as dotfile:
-        lines = dotfile.readlines()
+    @lru_cache(maxsize=None)
+    def is_valid(c: str) -> bool:
+        """
+        Check if class c is valid
 
-    # ignore first two lines and last line of dotfile
-    # (contain only digraph syntax elements)
-    lines = lines[2:-1]
+        Returns true if c is within the domain, does not end on "Test",
+        is not "package-info" and should not be ignored according to the deny  list
+        """
 
-    raw_deps = []
+        return (
+            c.startswith(domain)
+            and not c.endswith("Test")
+            and not c.endswith("package-info")
+            and not denied(c)
+        )
 
-    for l in lines:
-        match = re.match(PATTERN, l)
-        c = match.group(1)
-        d = match.group(2)
+    return is_valid
 
-        raw_deps.append((c, d))
 
-    return raw_deps
+# validation function for the configured domain and deny list
+is_valid = validator(DOMAIN, DENYLIST)
 
 
-def refine_deps(deps: dict) -> list:
+def iter_deps(path: str = DOTFILE_PATH):
+    """
+    Lazily yields the dependencies (c, d) of a directed graph stored in a dot file
+
+    The file is read line by line, lines that are not dependencies are skipped
+    """
+
+    with open(path) as dotfile:
+        for l in dotfile:
+            match = EDGE_PATTERN.match(l)
+
+            if match:
+                yield match.group(1), match.group(2)
+
+
+def parse(path: str = DOTFILE_PATH) -> list:
+    """
+    Parses the dependencies of a directed graph stored in a dot file
+    """
+
+    return list(iter_deps(path))
+
+
+def refine_deps(deps: dict, valid=None) -> list:
     """
     Refines the given dependencies by removing references to classes
     that are not in the given domain or should be removed according to the deny list
+    (or are not valid according to valid, default: is_valid)
     """
 
+    valid = valid or is_valid
     refined_deps = []
 
     for (c, d) in deps:
         # validate classes and add classes
-        if is_valid(c) and is_valid(d):
+        if valid(c) and valid(d):
             refined_deps.append((c, d))
 
     return refined_deps
 
 
-def get_classes(deps: dict) -> list:
+def get_classes(deps: dict, valid=None) -> list:
     """
     Returns a list of classes within in the domain that should not be ignored according to the deny list
+    (or are valid according to valid, default: is_valid)
     """
 
+    valid = valid or is_valid
     classes = []
 
     for (c, d) in deps:
-        if is_valid(c):
+        if valid(c):
             classes.append(c)
 
-        if is_valid(d):
+        if valid(d):
             classes.append(d)
 
     return classes
@@ -95,20 +157,57 @@ def build(classes: list, deps: list) -> dict:
     return depgraph
 
 
-def build_from_dotfile():
+def build_streaming(deps, valid=None) -> dict:
+    """
+    Builds the refined dependency graph in a single pass over the given dependencies
+
+    Equivalent to build(get_classes(deps), refine_deps(deps)),
+    but deps may be any iterable (e.g. iter_deps()) and is consumed only once.
+    Classes are validated with valid (default: is_valid)
+    """
+
+    valid = valid or is_valid
+    depgraph = {}
+
+    for (c, d) in deps:
+        valid_c = valid(c)
+        valid_d = valid(d)
+
+        if valid_c and c not in depgraph:
+            depgraph[c] = []
+
+        if valid_d and d not in depgraph:
+            depgraph[d] = []
+
+        if valid_c and valid_d:
+            depgraph[c].append(d)
+
+    return depgraph
+
+
+def build_from_dotfile(export_json: bool = True, path: str = DOTFILE_PATH, valid=None):
     """
     Builds the refined dependency graph for a project from dot file
+    (default: the configured dot file and validation, cf. is_valid)
+
+    The graph is stored in the binary graph format (cf. graph.Graph.save)
+    and, if export_json is set, additionally as JSON.
+    Returns the dependency graph
     """
 
     import json
 
-    raw_deps = parse()
-    refined_deps = refine_deps(raw_deps)
-    classes = get_classes(raw_deps)
+    from graph import Graph, GRAPH_PATH, JSON_PATH
+
+    depgraph = build_streaming(iter_deps(path), valid)
 
-    depgraph = build(classes, refined_deps)
+    Graph.from_dict(depgraph).save(GRAPH_PATH)
 
-    json.dump(depgraph, open("./data/depgraph.json", "w"), indent=4)
+    if export_json:
+        with open(JSON_PATH, "w") as f:
+            json.dump(depgraph, f, indent=4)
+
+    return depgraph
 
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+# binary graph file (cf. Graph.save) and JSON export of the dependency graph
+GRAPH_PATH = "./data/depgraph.bin"
+JSON_PATH = "./data/depgraph.json"
+
+# Layout of the binary graph file (little-endian, sections aligned to 8 bytes):
+# header: magic, version, number of classes, packages and edges,
+#         byte length of class names and package names
+# offsets (int64 x classes + 1), targets (int32 x edges), pkg_of (int32 x classes),
+# class names and package names (utf-8, separated by newlines)
+MAGIC = b"JADEGRPH"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQQ")
+
+
+class Graph(Mapping):
+    """
+    Compact dependency graph
+
+    Class and package names are interned to integer ids and the edges are stored
+    in CSR arrays, i.e. the dependencies of class i are targets[offsets[i] : offsets[i + 1]].
+    The package of class i is packages[pkg_of[i]].
+
+    A Graph behaves like the dict based dependency graph (class -> list of dependencies),
+    so all functions of measures.py can be applied to it.
+    """
+
+    def __init__(self, classes: list, packages: list, pkg_of, offsets, targets):
+        self.classes = classes
+        self.packages = packages
+        self.pkg_of = pkg_of
+        self.offsets = offsets
+        self.targets = targets
+
+        self._index = None
+
+    @classmethod
+    def from_dict(cls, depgraph: dict) -> "Graph":
+        """
+        Creates a graph from a dict based dependency graph
+
+        Dependencies that are not keys of depgraph are added as classes without dependencies
+        """
+
+        classes = list(depgraph)
+        index = {c: i for i, c in enumerate(classes)}
+
+        offsets = array("q", [0])
+        targets = array("i")
+
+        for c in depgraph:
+            for d in depgraph[c]:
+                if d not in index:
+                    index[d] = len(classes)
+                    classes.append(d)
+                targets.append(index[d])
+            offsets.append(len(targets))
+
+        # classes only known as dependencies have no dependencies
+        offsets.extend([len(targets)] * (len(classes) + 1 - len(offsets)))
+
+        packages = []
+        pkg_index = {}
+        pkg_of = array("i")
+
+        for c in classes:
+            p = c.rpartition(".")[0]
+            if p not in pkg_index:
+                pkg_index[p] = len(packages)
+                packages.append(p)
+            pkg_of.append(pkg_index[p])
+
+        graph = cls(classes, packages, pkg_of, offsets, targets)
+        graph._index = index
+
+        return graph
+
+    @classmethod
+    def load(cls, path: str = GRAPH_PATH) -> "Graph":
+        """
+        Loads a graph stored with Graph.save
+
+        The file is memory mapped and the CSR arrays are used without copying them
+        """
+
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, n, p, e, cls_len, pkg_len = HEADER.unpack_from(mm)
+
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{path} is not a graph file of version {VERSION}")
+
+        view = memoryview(mm)
+        pos = HEADER.size
+
+        def section(fmt, count):
+            nonlocal pos
+            size = count * struct.calcsize(fmt)
+            data = view[pos : pos + size].cast(fmt)
+            pos += _aligned(size)
+
+            # memory mapped data is little-endian
+            if sys.byteorder != "little":
+                data = array(fmt, data)
+                data.byteswap()
+
+            return data
+
+        offsets = section("q", n + 1)
+        targets = section("i", e)
+        pkg_of = section("i", n)
+
+        names = bytes(view[pos : pos + cls_len + pkg_len]).decode()
+        classes = names[:cls_len].split("\n") if n > 0 else []
+        packages = names[cls_len:].split("\n") if p > 0 else []
+
+        graph = cls(classes, packages, pkg_of, offsets, targets)
+        graph._mmap = mm
+
+        return graph
+
+    def save(self, path: str = GRAPH_PATH) -> None:
+        """
+        Stores the graph in the binary format read by Graph.load
+
+        The file is replaced atomically, so graphs still mapping the old file stay valid
+        """
+
+        import os
+
+        classes = "\n".join(self.classes).encode()
+        packages = "\n".join(self.packages).encode()
+
+        with open(path + ".tmp", "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    0,
+                    len(self.classes),
+                    len(self.packages),
+                    len(self.targets),
+                    len(classes),
+                    len(packages),
+                )
+            )
+
+            for fmt, data in (("q", self.offsets), ("i", self.targets), ("i", self.pkg_of)):
+                data = array(fmt, data)
+                if sys.byteorder != "little":
+                    data.byteswap()
+
+                raw = data.tobytes()
+                f.write(raw)
+                f.write(bytes(_aligned(len(raw)) - len(raw)))
+
+            f.write(classes)
+            f.write(packages)
+
+        os.replace(path + ".tmp", path)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the dict based dependency graph
+        """
+
+        return {c: self[c] for c in self.classes}
+
+    @property
+    def index(self) -> dict:
+        """
+        Maps each class name to its id (built on first use)
+        """
+
+        if self._index is None:
+            self._index = {c: i for i, c in enumerate(self.classes)}
+
+        return self._index
+
+    def id(self, c: str) -> int:
+        return self.index[c]
+
+    def successors(self, i: int):
+        """
+        Returns the ids of the dependencies of class i
+        """
+
+        return self.targets[self.offsets[i] : self.offsets[i + 1]]
+
+    def degree(self, i: int) -> int:
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def group_by_package(self) -> dict:
+        """
+        Groups the classes by packages (cf. measures.group_by_package)
+        """
+
+        packages = {}
+
+        for c, p in zip(self.classes, self.pkg_of):
+            packages.setdefault(self.packages[p], []).append(c)
+
+        return packages
+
+    def __getitem__(self, c: str) -> list:
+        classes = self.classes
+        return [classes[j] for j in self.successors(self.index[c])]
+
+    def __contains__(self, c) -> bool:
+        return c in self.index
+
+    def __iter__(self):
+        return iter(self.classes)
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def load(path: str = GRAPH_PATH, json_path: str = JSON_PATH) -> Graph:
+    """
+    Loads the dependency graph of a project
+
+    Uses the binary graph file if it exists and falls back to the JSON export
+    or, if there is none, to the database of the SQLite backend (cf. sqlstore.SQLGraph)
+    """
+
+    import json
+    import os
+
+    if os.path.exists(path):
+        return Graph.load(path)
+
+    if not os.path.exists(json_path):
+        from sqlstore import DB_PATH, SQLGraph
+
+        if os.path.exists(DB_PATH):
+            return SQLGraph(DB_PATH)
+
+    with open(json_path) as f:
+        return Graph.from_dict(json.load(f))
@@ -0,0 +1,118 @@
+class PackageTree:
+    """
+    Index of the package hierarchy, e.g. the packages "a.b.c" and "a.d" form the tree
+
+        "" -> "a" -> "a.b" -> "a.b.c"
+                  -> "a.d"
+
+    Each package (and each of its ancestors) is a node with an id, its parent and its depth
+    (the root "" has depth 0). The names are parsed only once when the tree is built.
+
+    The distance of two packages (the length of the path between them in the tree)
+    is answered in O(1) via the lowest common ancestor, which is looked up in a sparse table
+    of the Euler tour of the tree.
+    """
+
+    def __init__(self, packages):
+        self.ids = {"": 0}
+        self.names = [""]
+        self.parent = [-1]
+        self.depth = [0]
+        self.children = [[]]
+
+        for p in sorted(packages):
+            self._add(p)
+
+        self._build_euler_tour()
+        self._build_sparse_table()
+
+    def _add(self, name: str) -> int:
+        # add the missing ancestors of name from top to bottom
+        missing = []
+        while name not in self.ids:
+            missing.append(name)
+            name = name.rpartition(".")[0]
+
+        parent = self.ids[name]
+
+        for name in reversed(missing):
+            i = len(self.names)
+            self.ids[name] = i
+            self.names.append(name)
+            self.parent.append(parent)
+            self.depth.append(self.depth[parent] + 1)
+            self.children.append([])
+            self.children[parent].append(i)
+            parent = i
+
+        return parent
+
+    def _build_euler_tour(self) -> None:
+        # tour: nodes in the order of an iterative depth first search,
+        # a node is visited again after each of its children
+        self.tour = []
+        self.first = [0] * len(self.names)
+
+        stack = [(0, 0)]
+
+        while stack:
+            v, i = stack.pop()
+
+            if i == 0:
+                self.first[v] = len(self.tour)
+            self.tour.append(v)
+
+            if i < len(self.children[v]):
+                stack.append((v, i + 1))
+                stack.append((self.children[v][i], 0))
+
+    def _build_sparse_table(self) -> None:
+        # table[k][i]: node of minimal depth in tour[i : i + 2^k]
+        depth = self.depth
+        level = self.tour
+        self.table = [level]
+
+        k = 1
+        while 1 << k <= len(self.tour):
+            half = 1 << (k - 1)
+            level = [
+                a if depth[a] <= depth[b] else b
+                for a, b in zip(level, level[half:])
+            ]
+            self.table.append(level)
+            k += 1
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+
+    def id(self, name: str) -> int:
+        """
+        Returns the id of package name
+        """
+
+        return self.ids[name]
+
+    def lca(self, i: int, j: int) -> int:
+        """
+        Returns the id of the lowest common ancestor of the packages with ids i, j
+        """
+
+        l, r = self.first[i], self.first[j]
+        if l > r:
+            l, r = r, l
+
+        k = (r - l + 1).bit_length() - 1
+        a = self.table[k][l]
+        b = self.table[k][r - (1 << k) + 1]
+
+        return a if self.depth[a] <= self.depth[b] else b
+
+    def distance(self, i: int, j: int) -> int:
+        """
+        Returns the distance between the packages with ids i, j
+        """
+
+        return self.depth[i] + self.depth[j] - 2 * self.depth[self.lca(i, j)]
@@ -0,0 +1,244 @@
+import json
+import os
+
+import graph
+import measures
+
+# key of the settings and the code the stored measurement values were calculated with
+SETTINGS_PATH = "./data/incremental.json"
+
+
+def settings_key(vectorized: bool = True, approximate: measures.Approximation = None) -> str:
+    """
+    Returns the key of the settings and the code the measurement values depend on
+    """
+
+    import sys
+
+    import hierarchy
+    import scc
+    from cache import code_hash, key
+
+    return key(vectorized, approximate, code_hash(measures, hierarchy, scc, sys.modules[__name__]))
+
+
+def same_settings(settings: str) -> bool:
+    """
+    Returns true if the stored measurement values were calculated with the given settings key
+    (cf. settings_key and store_settings), i.e. if they may be updated incrementally
+    """
+
+    try:
+        with open(SETTINGS_PATH) as f:
+            return json.load(f)["settings"] == settings
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return False
+
+
+def store_settings(settings: str = None) -> None:
+    """
+    Stores the settings key of the measurement values in ./data (removes it if settings is None)
+    """
+
+    if settings is None:
+        if os.path.exists(SETTINGS_PATH):
+            os.remove(SETTINGS_PATH)
+        return
+
+    with open(SETTINGS_PATH, "w") as f:
+        json.dump({"settings": settings}, f)
+
+
+def previous_graph():
+    """
+    Loads the dependency graph of the previous run
+
+    Returns None if the previous run did not leave a graph and measurement values
+    for all registered measures (cf. measures.MEASURES)
+    """
+
+    if not all(os.path.exists(f"./data/{m}.json") for m in measures.MEASURES):
+        return None
+
+    try:
+        return graph.load()
+    except FileNotFoundError:
+        return None
+
+
+def changed_classes(old: dict, new: dict) -> set:
+    """
+    Determines the classes that were added, removed or whose dependencies changed
+    """
+
+    changed = {c for c in new if c not in old or old[c] != new[c]}
+    changed.update(c for c in old if c not in new)
+
+    return changed
+
+
+def affected_packages(old: dict, new: dict, changed: set) -> tuple:
+    """
+    Determines the packages whose measurement values may have changed
+
+    Returns a tuple (direct, transitive) of sets of packages:
+    - direct packages contain a changed class or a class that gained or lost a dependent
+      (NOC, Ca, Ce, I, DCM, DLM)
+    - transitive packages contain a class from which a changed class is reachable
+      in the old or new graph (P-DepDegree)
+    """
+
+    pkg = lambda c: c.rpartition(".")[0]
+
+    direct = set()
+
+    for c in changed:
+        old_deps = set(old[c]) if c in old else set()
+        new_deps = set(new[c]) if c in new else set()
+
+        direct.add(pkg(c))
+        direct.update(pkg(d) for d in old_deps ^ new_deps)
+
+    transitive = set()
+
+    for g in (old, new):
+        rdeps = measures.reverse_index(g)
+
+        reaching = {c for c in changed if c in g}
+        fringe = list(reaching)
+
+        while fringe:
+            c = fringe.pop()
+            for r in rdeps.get(c, ()):
+                if r not in reaching:
+                    reaching.add(r)
+                    fringe.append(r)
+
+        transitive.update(pkg(c) for c in reaching)
+
+    return direct, transitive
+
+
+def update(
+    results: dict,
+    old: dict,
+    new: dict,
+    packages: dict = None,
+    vectorized: bool = True,
+    workers: int = 1,
+    timings: dict = None,
+    approximate: measures.Approximation = None,
+    cond=None,
+) -> tuple:
+    """
+    Updates the measurement values of the old dependency graph (results, in place)
+    to the values of the new dependency graph with the packages (default: group_by_package(new))
+    and its condensed graph cond (default: scc.condense(new))
+
+    Only the packages affected by the changes between the old and the new dependency graph
+    are recalculated, the values of all other packages are kept.
+    Returns the sets of directly and transitively affected packages
+    """
+
+    if packages is None:
+        packages = measures.group_by_package(new)
+
+    old_total = sum(len(old[c]) for c in old)
+    new_total = sum(len(new[c]) for c in new)
+
+    changed = changed_classes(old, new)
+    direct, transitive = affected_packages(old, new, changed)
+
+    if old_total == 0:
+        # the previous values do not allow rescaling P-DepDegree
+        transitive = set(packages)
+
+    # P-DepDegree of unaffected packages only changes with the number of edges
+    if old_total != new_total:
+        pdds = results["p-depdegree"]
+        for p, v in pdds.items():
+            pdds[p] = round(v * old_total) / new_total if new_total > 0 else 0
+
+    updated = measures.calc_packages(
+        new,
+        packages,
+        direct,
+        vectorized,
+        workers,
+        timings,
+        approximate,
+        names=list(measures.MEASURES) + ["condensation"],
+        artifacts={"condensation": cond} if cond is not None else None,
+    )
+    cond = updated.pop("condensation")
+
+    pdd_only = {p: packages[p] for p in transitive - direct if p in packages}
+    updated["p-depdegree"].update(measures.pdd_all(pdd_only, new, cond))
+
+    for m, values in results.items():
+        values.update(updated[m])
+
+        # remove packages that no longer exist
+        for p in values.keys() - packages.keys():
+            del values[p]
+
+    return direct, transitive
+
+
+def calc(
+    old: dict,
+    vectorized: bool = True,
+    workers: int = 1,
+    timings: dict = None,
+    approximate: measures.Approximation = None,
+    class_level: bool = True,
+) -> tuple:
+    """
+    Updates the measurement values stored under ./data
+    for the dependency graph of the current run (cf. graph.load and update),
+    the class level measures (if class_level is set) are recalculated completely
+
+    Returns the sets of directly and transitively affected packages
+    """
+
+    import scc
+    from instrument import timed
+
+    new = graph.load()
+    packages = measures.group_by_package(new)
+
+    # shared by the update, the class cycles and the class level measures
+    cond = timed(timings, "condensation", scc.condense, new)
+
+    results = {}
+    for m in measures.MEASURES:
+        with open(f"./data/{m}.json") as f:
+            results[m] = json.load(f)
+
+    direct, transitive = update(
+        results, old, new, packages, vectorized, workers, timings, approximate, cond
+    )
+
+    measures.store(results)
+
+    # the subtree measures are cheap to recalculate and may change for any ancestor
+    measures.store_rollup(timed(timings, "rollup", measures.rollup, packages, new))
+
+    # the package matrix is rebuilt in one pass,
+    # a changed dependency may close or break a cycle anywhere in the graph
+    import cycles
+    from package_matrix import PackageMatrix
+
+    matrix = timed(timings, "package_matrix", PackageMatrix.build, new)
+    matrix.save()
+
+    cycles.store(timed(timings, "cycles", cycles.calc, new, None, matrix, cond))
+
+    import class_measures
+
+    if class_level:
+        class_measures.store(timed(timings, "class_measures", class_measures.calc, new, None, cond))
+    else:
+        class_measures.clear()
+
+    return direct, transitive
@@ -0,0 +1,154 @@
+import json
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss() -> int:
+    """
+    Returns the peak resident set size (in bytes) of this process and its terminated children
+    """
+
+    if resource is None:
+        return None
+
+    import sys
+
+    # ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+
+    return unit * max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def timed(timings: dict, name: str, f, *args):
+    """
+    Runs f(*args) and adds its wall and CPU time to timings[name] = [wall, cpu, calls, items]
+
+    items counts the entries of dict results, e.g. the packages measured by a measure.
+    If timings is None, f is just called
+    """
+
+    if timings is None:
+        return f(*args)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+
+    result = f(*args)
+
+    t = timings.setdefault(name, [0.0, 0.0, 0, 0])
+    t[0] += time.perf_counter() - wall
+    t[1] += time.process_time() - cpu
+    t[2] += 1
+    t[3] += len(result) if isinstance(result, dict) else 0
+
+    return result
+
+
+def merge(timings: dict, other: dict) -> None:
+    """
+    Adds the timings of other to timings
+    """
+
+    for name, values in other.items():
+        t = timings.setdefault(name, [0.0, 0.0, 0, 0])
+        for i, v in enumerate(values):
+            t[i] += v
+
+
+class Metrics:
+    """
+    Collects wall time, CPU time, memory and item counts of the pipeline stages
+    and the timings of the measures (cf. timed)
+
+    The memory of a stage is the growth of the peak RSS of the process during the stage
+    (peak_rss_growth, 0 if the stage stayed below the peak of earlier stages) and
+    the peak RSS of the process so far (process_peak_rss), cf. peak_rss.
+
+    With trace_memory, the peak memory allocated by Python during each stage is recorded (tracemalloc).
+    With profile, the whole run is profiled with cProfile.
+    """
+
+    def __init__(self, trace_memory: bool = False, profile: bool = False):
+        self.stages = {}
+        self.measures = {}
+        self.trace_memory = trace_memory
+        self.profiler = None
+
+        if trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+
+        if profile:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Records the stage name, the body may set the number of processed items
+        on the yielded dict (key "items")
+        """
+
+        record = {}
+
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.reset_peak()
+
+        rss = peak_rss()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        yield record
+
+        record["wall"] = time.perf_counter() - wall
+        record["cpu"] = time.process_time() - cpu
+        record["process_peak_rss"] = peak_rss()
+        record["peak_rss_growth"] = record["process_peak_rss"] - rss if rss is not None else None
+
+        if self.trace_memory:
+            import tracemalloc
+
+            record["peak_traced"] = tracemalloc.get_traced_memory()[1]
+
+        self.stages[name] = record
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": self.stages,
+            "measures": {
+                name: {"wall": wall, "cpu": cpu, "calls": calls, "items": items}
+                for name, (wall, cpu, calls, items) in self.measures.items()
+            },
+        }
+
+    def dump(self, path: str) -> None:
+        """
+        Stores the metrics as JSON under path
+        (and the cProfile statistics, if profiled, under path with suffix .prof)
+        and ends tracing and profiling
+        """
+
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.stop()
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(path.rpartition(".")[0] + ".prof")
@@ -11,16 +11,152 @@ if not os.path.exists("./reports"):
     os.mkdir("reports")  
 
 
+from config import METRICS, PROFILE, TRACEMALLOC
+from instrument import Metrics
+metrics = Metrics(trace_memory=TRACEMALLOC, profile=PROFILE)
+
+from cache import Cache, code_hash, file_hash, key
+from config import CACHE
+cache = Cache() if CACHE else None
+
+def run_stage(name, inputs, outputs, f):
+    # stages with unchanged inputs are skipped (cf. cache.Cache)
+    if cache is None:
+        return f()
+    return cache.run(name, key(*inputs), outputs, f)
+
 print("Parsing dependency graph...")
 import depgraph
-depgraph.build_from_dotfile()
+import graph
+import incremental
+import sqlstore
+from config import BACKEND, DENYLIST, DOMAIN, DOTFILE_PATH, EXPORT_JSON, INCREMENTAL
+graph_path = sqlstore.DB_PATH if BACKEND == "sqlite" else graph.GRAPH_PATH
+previous = None
+
+def build_graph():
+    global previous
+    if BACKEND == "sqlite":
+        return len(sqlstore.build_from_dotfile())
+    previous = incremental.previous_graph() if INCREMENTAL else None
+    return len(depgraph.build_from_dotfile(export_json=EXPORT_JSON))
+
+with metrics.stage("depgraph") as stage:
+    stage["items"] = run_stage(
+        "depgraph",
+        (
+            file_hash(DOTFILE_PATH),
+            DOMAIN,
+            DENYLIST,
+            EXPORT_JSON,
+            BACKEND,
+            code_hash(depgraph, graph, sqlstore),
+        ),
+        [graph_path] + ([graph.JSON_PATH] if EXPORT_JSON and BACKEND != "sqlite" else []),
+        build_graph,
+    )
+    stage["cached"] = cache is not None and "depgraph" in cache.hits
 
 print("Calculating measurement values...")
+import hierarchy
 import measures
-measures.calc()
+import scc
+import class_measures
+import cycles
+import package_matrix
+from config import APPROXIMATE_EPSILON, APPROXIMATE_SEED, APPROXIMATE_THRESHOLD, VECTORIZED, WORKERS
+from config import CLASS_MEASURES
+approximate = measures.Approximation(APPROXIMATE_THRESHOLD, APPROXIMATE_EPSILON, APPROXIMATE_SEED)
+settings = incremental.settings_key(VECTORIZED, approximate)
+
+def calc_measures():
+    if BACKEND == "sqlite":
+        incremental.store_settings(None)
+        results = sqlstore.calc(
+            vectorized=VECTORIZED, timings=metrics.measures, approximate=approximate
+        )
+        return len(results["noc"])
+
+    # values of other settings or code are recalculated completely
+    if previous is not None and incremental.same_settings(settings):
+        direct, transitive = incremental.calc(
+            previous,
+            vectorized=VECTORIZED,
+            workers=WORKERS,
+            timings=metrics.measures,
+            approximate=approximate,
+            class_level=CLASS_MEASURES,
+        )
+        items = len(direct | transitive)
+    else:
+        results = measures.calc(
+            vectorized=VECTORIZED,
+            workers=WORKERS,
+            timings=metrics.measures,
+            approximate=approximate,
+            class_level=CLASS_MEASURES,
+        )
+        items = len(results["noc"])
+
+    incremental.store_settings(settings)
+    return items
+
+data_paths = [f"./data/{m}.json" for m in measures.MEASURES] + ["./data/rollup.json"]
+data_paths.append(package_matrix.default_path())
+if BACKEND != "sqlite":
+    data_paths.append("./data/cycles.json")
+if CLASS_MEASURES and BACKEND != "sqlite":
+    data_paths.append(class_measures.CLASSES_PATH)
+
+with metrics.stage("measures") as stage:
+    stage["items"] = run_stage(
+        "measures",
+        (
+            file_hash(graph_path),
+            VECTORIZED,
+            approximate,
+            CLASS_MEASURES,
+            code_hash(measures, hierarchy, scc, incremental, sqlstore, package_matrix, cycles, class_measures),
+        ),
+        data_paths,
+        calc_measures,
+    )
+    stage["cached"] = cache is not None and "measures" in cache.hits
 
 print("Creating report...")
 import report
-report.generate()
+from config import PLOTS, ROLLUP_DEPTH
+
+def create_report():
+    path = report.generate(plots=PLOTS, workers=WORKERS)
+    return [path, len(report.DATA["noc"])]
+
+with metrics.stage("report") as stage:
+    path, stage["items"] = run_stage(
+        "report",
+        (
+            file_hash(graph_path),
+            [file_hash(p) for p in data_paths],
+            DOMAIN,
+            DOTFILE_PATH,
+            DENYLIST,
+            PLOTS,
+            ROLLUP_DEPTH,
+            code_hash(report, graph, class_measures, cycles),
+        ),
+        lambda result: [result[0]] + (report.graph_paths() if PLOTS else []),
+        create_report,
+    )
+    stage["cached"] = cache is not None and "report" in cache.hits
+
+if METRICS:
+    if cache is not None and "report" in cache.hits:
+        # the report of a previous run is reused, its metrics are kept
+        from datetime import datetime
+
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        metrics.dump(f"./reports/{DOMAIN} - {date} (cached) - metrics.json")
+    else:
+        metrics.dump(path.rpartition(".")[0] + " - metrics.json")
 
-print("Done.")
\ No newline at end of file
+print("Done.")
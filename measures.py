@@ -1,5 +1,9 @@
 import json
-from collections import defaultdict, OrderedDict
+from collections import defaultdict, namedtuple, OrderedDict
+
+# DCM_LCOM3 and DCM_SIM of packages with more than threshold classes are estimated
+# (cf. dcm_approx) with an error of at most epsilon, threshold None disables the approximation
+Approximation = namedtuple("Approximation", ["threshold", "epsilon", "seed"])
 
 def pdd(pkg: list, depgraph: dict):
     """
@@ -20,6 +24,44 @@ def pdd(pkg: list, depgraph: dict):
     return sum([len(tdg[c]) for c in tdg]) / sum([len(depgraph[c]) for c in depgraph])
 
 
+def pdd_all(packages: dict, depgraph: dict, cond=None) -> dict:
+    """
+    Calculates P-DepDegree for all packages at once
+
+    The dependency graph is condensed into its strongly connected components once
+    (cond, default: scc.condense), so the edges reachable from a package are obtained
+    by a union of precomputed reachability bitsets instead of a fresh traversal per package.
+    """
+
+    import scc
+
+    cond = cond or scc.condense(depgraph)
+    reach = scc.reachability(cond)
+
+    weight = cond.weight
+    if scc.np is not None:
+        weight = scc.np.asarray(weight, dtype=scc.np.int64)
+
+    # number of edges in depgraph (computed only once)
+    total = sum(cond.weight)
+
+    results = {}
+    cache = {}
+
+    for p, pkg_classes in packages.items():
+        mask = 0
+        for comp in {cond.comp_of[c] for c in pkg_classes}:
+            mask |= reach[comp]
+
+        # packages reaching the same components share the edge count
+        if mask not in cache:
+            cache[mask] = scc.reached_weight(mask, weight)
+
+        results[p] = cache[mask] / total if total > 0 else 0
+
+    return results
+
+
 def _dist(a: str, b: str) -> int:
     """
     Calculates the distance between to packages a, b
@@ -32,20 +74,23 @@ def _dist(a: str, b: str) -> int:
 
     >>> _dist("a.b.c.d", "a.b")
     2
+
+    >>> _dist("a.x.c", "a.y.c")
+    4
     """
 
     path_a = a.split(".")
     path_b = b.split(".")
 
-    # remove shared path
-    # i.e. "a.b.c.d" & "a.b.e.f" => "c.d" & "e.f"
-    zipped = list(zip(path_a, path_b))
-    for i, j in zipped:
-        if i == j:
-            path_a.pop(0)
-            path_b.pop(0)
+    # length of the shared path
+    # i.e. "a.b.c.d" & "a.b.e.f" => "a.b"
+    shared = 0
+    for i, j in zip(path_a, path_b):
+        if i != j:
+            break
+        shared += 1
 
-    return len(path_a) + len(path_b)
+    return len(path_a) + len(path_b) - 2 * shared
 
 
 def dlm(pkg_name: str, deps: set) -> int:
@@ -69,6 +114,141 @@ def dlm(pkg_name: str, deps: set) -> int:
     return sum([distances[p] * packages[p] for p in packages])
 
 
+def package_nodes(packages: dict, depgraph: dict, pkg_of: dict = None, tree=None) -> tuple:
+    """
+    Maps the classes of the packages and their dependencies to the nodes of the package tree
+    (cf. hierarchy.PackageTree), the package names are parsed only once
+
+    pkg_of maps classes to their packages (cf. class_packages),
+    dependencies not in pkg_of lie in the package given by their name.
+    By default, the tree of all these packages is built.
+    Returns a tuple (tree, node_of)
+    """
+
+    from hierarchy import PackageTree
+
+    pkg_of = pkg_of if pkg_of is not None else class_packages(packages)
+
+    pkg = {}
+    for pkg_classes in packages.values():
+        for c in pkg_classes:
+            for d in depgraph[c]:
+                if d not in pkg:
+                    p = pkg_of.get(d)
+                    pkg[d] = p if p is not None else d.rpartition(".")[0]
+            pkg[c] = pkg_of.get(c, c.rpartition(".")[0])
+
+    if tree is None:
+        tree = PackageTree(set(pkg.values()) | set(packages))
+
+    ids = {p: tree.id(p) for p in set(pkg.values())}
+
+    return tree, {c: ids[p] for c, p in pkg.items()}
+
+
+def dlm_all(packages: dict, depgraph: dict, pkg_of: dict = None, tree=None) -> dict:
+    """
+    Calculates the dependency locality measure for all packages at once
+
+    The distance between two packages is looked up in constant time in the package tree
+    (cf. package_nodes).
+    """
+
+    from collections import Counter
+
+    tree, node_of = package_nodes(packages, depgraph, pkg_of, tree)
+    results = {}
+
+    for p, pkg_classes in packages.items():
+        # 1. Determine the packages the dependencies lie in
+        counts = Counter(node_of[d] for d in set().union(*[depgraph[c] for c in pkg_classes]))
+
+        # 2. Sum up the distances between p and the packages of its dependencies
+        i = tree.id(p)
+        results[p] = sum([tree.distance(i, j) * n for j, n in counts.items()])
+
+    return results
+
+
+def rollup(packages: dict, depgraph: dict, pkg_of: dict = None) -> dict:
+    """
+    Calculates NOC, Ca, Ce and instability for the subtrees of the package hierarchy,
+    i.e. for each package (or ancestor of a package) together with all its subpackages
+
+    Every class and every dependency is visited once (cf. rollup_tree).
+    Returns a dict mapping each package of the tree to a tuple (NOC, Ca, Ce, I)
+    """
+
+    tree, node_of = package_nodes(packages, depgraph, pkg_of)
+
+    nocs = {tree.id(p): len(pkg_classes) for p, pkg_classes in packages.items()}
+    class_targets = (
+        (tree.id(p), {node_of[d] for d in depgraph[c]})
+        for p, pkg_classes in packages.items()
+        for c in pkg_classes
+    )
+
+    return rollup_tree(tree, nocs, class_targets)
+
+
+def rollup_tree(tree, nocs: dict, class_targets) -> dict:
+    """
+    Calculates the subtree measures of rollup on the package tree (cf. hierarchy.PackageTree)
+
+    nocs maps tree nodes to their number of classes and class_targets yields for each class
+    a tuple (node of its package, set of nodes of the packages of its dependencies).
+    Each class adds its contributions to single nodes of the tree, the values of a subtree
+    are then obtained by merging the aggregates of the children into their parents (bottom-up).
+    """
+
+    depth, first = tree.depth, tree.first
+
+    n = len(tree)
+    nocs = [nocs.get(v, 0) for v in range(n)]
+    aff = [0] * n
+    eff = [0] * n
+
+    for i, targets in class_targets:
+        if not targets:
+            continue
+
+        # Ce: the class counts for all subtrees containing its package up to (excluding)
+        # the highest common ancestor with the package of a dependency
+        top = min((tree.lca(i, j) for j in targets), key=depth.__getitem__)
+        eff[i] += 1
+        eff[top] -= 1
+
+        # Ca: the class counts once for all subtrees on the paths from the packages
+        # of its dependencies to the root (union of the paths, the lowest common ancestors
+        # of neighbours in the order of the Euler tour are counted only once) ...
+        order = sorted(targets, key=first.__getitem__)
+        for j in order:
+            aff[j] += 1
+        for j, k in zip(order, order[1:]):
+            aff[tree.lca(j, k)] -= 1
+
+        # ... except for the subtrees containing the class itself
+        aff[max((tree.lca(i, j) for j in targets), key=depth.__getitem__)] -= 1
+
+    # merge the aggregates of the children into their parents
+    # (the parent of a node always has a smaller id)
+    for v in range(n - 1, 0, -1):
+        parent = tree.parent[v]
+        nocs[parent] += nocs[v]
+        aff[parent] += aff[v]
+        eff[parent] += eff[v]
+
+    return {
+        tree.names[v]: (
+            nocs[v],
+            aff[v],
+            eff[v],
+            eff[v] / (aff[v] + eff[v]) if aff[v] + eff[v] > 0 else 0,
+        )
+        for v in range(1, n)
+    }
+
+
 def dcm_lcom3(pkg: list):
     """
     Variant of dcm based on LCOM3
@@ -115,6 +295,151 @@ def dcm_cc(pkg: list):
     return sum(counts) / (len(pkg) * len(deps)) if len(pkg) > 0 and len(deps) > 0 else 0
 
 
+def dcm_matrix(pkg: list, chunk: int = 1 << 22) -> tuple:
+    """
+    Calculates DCM_LCOM3, DCM_SIM and DCM_CC at once
+    based on the class x dependency incidence matrix A of the package
+
+    The sizes of all pairwise intersections are taken from the Gram matrix A * A^T,
+    which is computed in blocks of rows holding at most chunk entries.
+    Returns a tuple (DCM_LCOM3, DCM_SIM, DCM_CC) with the same values as
+    dcm_lcom3, dcm_sim and dcm_cc
+    """
+
+    import numpy as np
+    from scipy import sparse
+
+    index = {}
+    rows = []
+    cols = []
+
+    for i, c in enumerate(pkg):
+        for d in c:
+            rows.append(i)
+            cols.append(index.setdefault(d, len(index)))
+
+    n, m = len(pkg), len(index)
+    npairs = n * (n - 1) // 2
+
+    if m == 0:
+        return 0, 0.0 if npairs > 0 else 0, 0
+
+    A = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, m)
+    )
+    At = A.T.tocsc()
+    sizes = np.diff(A.indptr)
+
+    lcom3 = 0
+    sim = 0.0
+    step = max(1, chunk // n)
+    j = np.arange(n)
+
+    for start in range(0, n, step):
+        i = np.arange(start, min(start + step, n))
+
+        # only pairs (i, j) with i < j in row-major order, as in dcm_sim
+        pairs = j[None, :] > i[:, None]
+        inter = (A[i] @ At).toarray()[pairs]
+        union = (sizes[i][:, None] + sizes[None, :])[pairs] - inter
+
+        lcom3 += int(np.count_nonzero(inter))
+
+        sims = np.zeros(len(inter))
+        np.divide(inter, union, out=sims, where=union > 0)
+        sim = sum(sims.tolist(), sim)
+
+    return (
+        lcom3,
+        sim / npairs if npairs > 0 else 0,
+        # each class contributes one count per dependency it has
+        len(rows) / (n * m),
+    )
+
+
+def dcm_approx(pkg: list, epsilon: float = 0.05, seed: int = 0, chunk: int = 1 << 22) -> tuple:
+    """
+    Estimates DCM_LCOM3 and DCM_SIM (and calculates DCM_CC) in O(n * k) instead of O(n^2)
+
+    - DCM_SIM: the number of classes with the same MinHash value under a random hash function
+      estimates the sum of the Jaccard similarities of all pairs of classes.
+      It is averaged over k hash functions, the signatures are computed in blocks
+      holding at most chunk hash values.
+    - DCM_LCOM3: the fraction of k uniformly sampled pairs of classes sharing a dependency
+      is scaled to the number of pairs.
+
+    k is chosen such that (Hoeffding's inequality) with a probability of 95% the estimated DCM_SIM
+    and the estimated fraction of pairs sharing a dependency deviate by at most epsilon.
+    The estimates are reproducible for the same seed.
+    Returns a tuple (DCM_LCOM3, DCM_SIM, DCM_CC)
+    """
+
+    import math
+
+    import numpy as np
+
+    index = {}
+    rows = []
+    cols = []
+
+    for i, c in enumerate(pkg):
+        for d in c:
+            rows.append(i)
+            cols.append(index.setdefault(d, len(index)))
+
+    n, m = len(pkg), len(index)
+    npairs = n * (n - 1) // 2
+
+    if m == 0:
+        return 0, 0.0 if npairs > 0 else 0, 0
+
+    cc = len(rows) / (n * m)
+
+    if npairs == 0:
+        return 0, 0, cc
+
+    k = math.ceil(math.log(2 / 0.05) / (2 * epsilon**2))
+    rng = np.random.default_rng(seed)
+
+    # MinHash signatures of the classes with dependencies (rows are sorted by class),
+    # hash functions (a * x + b) mod P with a prime P
+    P = (1 << 31) - 1
+    rows = np.asarray(rows)
+    cols = np.asarray(cols, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+
+    collisions = 0
+    step = max(1, chunk // len(cols))
+
+    for h in range(0, k, step):
+        size = min(step, k - h)
+        a = rng.integers(1, P, size=(size, 1))
+        b = rng.integers(0, P, size=(size, 1))
+
+        signatures = np.minimum.reduceat((a * cols + b) % P, starts, axis=1)
+        signatures.sort(axis=1)
+
+        # in each sorted signature, a class collides with all preceding classes of its run
+        pos = np.arange(signatures.shape[1])
+        first = np.ones(signatures.shape, dtype=bool)
+        first[:, 1:] = signatures[:, 1:] != signatures[:, :-1]
+        run_start = np.maximum.accumulate(np.where(first, pos, 0), axis=1)
+
+        collisions += int((pos - run_start).sum())
+
+    sim = collisions / k / npairs
+
+    # sampled pairs (i, j) with i != j
+    i = rng.integers(0, n, size=k)
+    j = rng.integers(0, n - 1, size=k)
+    j += j >= i
+
+    shared = sum(1 for x, y in zip(i.tolist(), j.tolist()) if not pkg[x].isdisjoint(pkg[y]))
+    lcom3 = round(shared / k * npairs)
+
+    return lcom3, sim, cc
+
+
 def noc(pkg):
     """
     Number of classes (and interfaces)
@@ -154,7 +479,62 @@ def instability(pkg, depgraph):
     eff = ce(pkg, depgraph)
 
     return eff / (aff + eff) if aff + eff > 0 else 0
-   
+
+
+def reverse_index(depgraph: dict) -> dict:
+    """
+    Builds the afferent (reverse) index of the dependency graph
+
+    Maps each class to the list of classes that depend on it
+    """
+
+    rdeps = defaultdict(list)
+
+    for c, deps in depgraph.items():
+        for d in deps:
+            rdeps[d].append(c)
+
+    return rdeps
+
+
+def class_packages(packages: dict) -> dict:
+    """
+    Maps each class to the package it lies in
+    """
+
+    return {c: p for p, pkg_classes in packages.items() for c in pkg_classes}
+
+
+def coupling(packages: dict, depgraph: dict, rdeps: dict = None, pkg_of: dict = None) -> dict:
+    """
+    Calculates Ca, Ce and instability for all packages at once
+
+    Every edge is visited once in each direction, i.e. once via the afferent
+    index (Ca) and once via the dependency graph (Ce).
+    Returns a dict mapping each package to a tuple (Ca, Ce, I)
+    """
+
+    if rdeps is None:
+        rdeps = reverse_index(depgraph)
+
+    if pkg_of is None:
+        pkg_of = class_packages(packages)
+
+    results = {}
+
+    for p, pkg_classes in packages.items():
+        # classes outside p that depend on a class within p
+        afferent = {c for d in pkg_classes for c in rdeps.get(d, ()) if pkg_of.get(c) != p}
+
+        # classes within p that depend on a class outside p
+        eff = len([c for c in pkg_classes if any(pkg_of.get(d) != p for d in depgraph[c])])
+        aff = len(afferent)
+
+        results[p] = (aff, eff, eff / (aff + eff) if aff + eff > 0 else 0)
+
+    return results
+
+
 def group_by_package(depgraph:dict):
     packages = defaultdict(list)
 
@@ -165,47 +545,457 @@ def group_by_package(depgraph:dict):
     return packages
 
 
-def calc() -> None:
+# state shared with the worker processes of calc_packages (inherited via fork)
+_shared = None
+
+
+def _package_measures(
+    class_deps: list,
+    vectorized: bool,
+    timings: dict = None,
+    approximate: Approximation = None,
+) -> tuple:
+    """
+    Calculates the measures of a package that only depend on its own classes and their dependencies,
+    class_deps contains the set of dependencies of each class of the package
+
+    If timings is given, the time spent per variant of DCM is added to it (cf. instrument.timed).
+    DCM_LCOM3 and DCM_SIM of large packages are estimated according to approximate
+    (only if vectorized, cf. dcm_approx).
+    Returns a tuple (NOC, DCM_LCOM3, DCM_SIM, DCM_CC, approximated)
+    """
+
+    from instrument import timed
+
+    approximated = (
+        vectorized
+        and approximate is not None
+        and approximate.threshold is not None
+        and len(class_deps) > approximate.threshold
+    )
+
+    # dependency cohesion measure (timed as part of the artifact package_measures)
+    if approximated:
+        dcms = timed(
+            timings,
+            "package_measures.dcm_approx",
+            dcm_approx,
+            class_deps,
+            approximate.epsilon,
+            approximate.seed,
+        )
+    elif vectorized:
+        dcms = timed(timings, "package_measures.dcm_matrix", dcm_matrix, class_deps)
+    else:
+        dcms = (
+            timed(timings, "package_measures.dcm_lcom3", dcm_lcom3, class_deps),
+            timed(timings, "package_measures.dcm_sim", dcm_sim, class_deps),
+            timed(timings, "package_measures.dcm_cc", dcm_cc, class_deps),
+        )
+
+    return (noc(class_deps), *dcms, approximated)
+
+
+def _calc_shard(shard: list) -> tuple:
+    class_deps, packages, vectorized, timed, approximate = _shared
+    timings = {} if timed else None
+
+    values = [
+        (
+            p,
+            _package_measures([class_deps[c] for c in packages[p]], vectorized, timings, approximate),
+        )
+        for p in shard
+    ]
+
+    return values, timings
+
+
+def _calc_parallel(
+    packages: dict,
+    class_deps: dict,
+    vectorized: bool,
+    workers: int,
+    timings: dict = None,
+    approximate: Approximation = None,
+) -> dict:
+    """
+    Calculates _package_measures for all packages in a pool of worker processes
+
+    The workers are forked and inherit the dependency sets of the classes, so they are not pickled per task.
+    Packages are dealt to the shards from largest to smallest to balance the load.
+    """
+
+    global _shared
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from instrument import merge
+
+    order = sorted(packages, key=lambda p: len(packages[p]), reverse=True)
+    shards = [order[i :: workers * 4] for i in range(min(len(order), workers * 4))]
+
+    _shared = class_deps, packages, vectorized, timings is not None, approximate
+    local = {}
+
+    try:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            for values, shard_timings in pool.map(_calc_shard, shards):
+                local.update(values)
+
+                if timings is not None:
+                    merge(timings, shard_timings)
+    finally:
+        _shared = None
+
+    return local
+
+
+# Registry of the shared artifacts and the measures calculated by calc_packages:
+# name -> (names of the required artifacts or measures, function)
+# The function is called with the context and the required values, an artifact may be anything,
+# a measure returns a dict mapping each selected package to its value.
+ARTIFACTS = {}
+MEASURES = {}
+
+
+def artifact(name: str, *requires: str):
+    """
+    Registers the decorated function as the shared artifact name (cf. Context)
+    """
+
+    def register(f):
+        ARTIFACTS[name] = (requires, f)
+        return f
+
+    return register
+
+
+def measure(name: str, *requires: str):
+    """
+    Registers the decorated function as measure name, e.g.
+
+        @measure("nod", "class_deps")
+        def number_of_dependencies(ctx, class_deps):
+            return {p: sum(len(class_deps[c]) for c in ctx.packages[p]) for p in ctx.packages}
+    """
+
+    def register(f):
+        MEASURES[name] = (requires, f)
+        return f
+
+    return register
+
+
+class Context:
+    """
+    Calculation of the measures of the selected packages
+
+    Artifacts and measures are calculated on first access (ctx[name]) from their requirements
+    and then reused, i.e. each is calculated at most once per run.
+    If timings is given, the time spent per artifact and measure is added to it,
+    artifacts maps names to values calculated before (used instead of calculating them).
+    """
+
+    def __init__(
+        self,
+        depgraph: dict,
+        all_packages: dict,
+        packages: dict,
+        vectorized: bool = True,
+        workers: int = 1,
+        timings: dict = None,
+        approximate: Approximation = None,
+        artifacts: dict = None,
+    ):
+        self.depgraph = depgraph
+        self.all_packages = all_packages
+        self.packages = packages
+        self.vectorized = vectorized
+        self.workers = workers
+        self.timings = timings
+        self.approximate = approximate
+
+        self.values = dict(artifacts or {})
+
+    def __getitem__(self, name: str):
+        if name not in self.values:
+            from instrument import timed
+
+            requires, f = ARTIFACTS[name] if name in ARTIFACTS else MEASURES[name]
+            args = [self[r] for r in requires]
+
+            self.values[name] = timed(self.timings, name, f, self, *args)
+
+        return self.values[name]
+
+
+@artifact("class_deps")
+def _class_deps(ctx):
+    # dependency set of each class of the selected packages
+    return {c: set(ctx.depgraph[c]) for pkg_classes in ctx.packages.values() for c in pkg_classes}
+
+
+@artifact("reverse_index")
+def _reverse_index(ctx):
+    return reverse_index(ctx.depgraph)
+
+
+@artifact("class_packages")
+def _class_packages(ctx):
+    return class_packages(ctx.all_packages)
+
+
+@artifact("package_matrix")
+def _package_matrix(ctx):
+    # number of class dependencies between all packages (cf. package_matrix.PackageMatrix),
+    # a graph.Graph knows the package of each class
+    from package_matrix import PackageMatrix
+
+    packages = None if hasattr(ctx.depgraph, "pkg_of") else ctx.all_packages
+
+    return PackageMatrix.build(ctx.depgraph, packages)
+
+
+@artifact("condensation")
+def _condensation(ctx):
+    # strongly connected components of the whole graph (cf. scc.condense),
+    # shared by P-DepDegree, the class cycles and the class level measures
+    import scc
+
+    return scc.condense(ctx.depgraph)
+
+
+@artifact("coupling", "reverse_index", "class_packages")
+def _coupling(ctx, rdeps, pkg_of):
+    # coupling measures of all packages in one pass over the edges
+    return coupling(ctx.packages, ctx.depgraph, rdeps, pkg_of)
+
+
+@artifact("package_measures", "class_deps")
+def _local(ctx, class_deps):
+    # measures depending only on the classes of a package
+    import multiprocessing
+
+    packages = ctx.packages
+
+    if ctx.workers > 1 and len(packages) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        return _calc_parallel(
+            packages, class_deps, ctx.vectorized, ctx.workers, ctx.timings, ctx.approximate
+        )
+
+    return {
+        p: _package_measures(
+            [class_deps[c] for c in pkg_classes], ctx.vectorized, ctx.timings, ctx.approximate
+        )
+        for p, pkg_classes in packages.items()
+    }
+
+
+# number of classes (and interfaces)
+@measure("noc", "package_measures")
+def _noc(ctx, local):
+    return {p: local[p][0] for p in ctx.packages}
+
+
+# coupling measures
+@measure("ca", "coupling")
+def _ca(ctx, cpl):
+    return {p: cpl[p][0] for p in ctx.packages}
+
+
+@measure("ce", "coupling")
+def _ce(ctx, cpl):
+    return {p: cpl[p][1] for p in ctx.packages}
+
+
+@measure("instability", "ca", "ce")
+def _instability(ctx, aff, eff):
+    return {
+        p: eff[p] / (aff[p] + eff[p]) if aff[p] + eff[p] > 0 else 0 for p in ctx.packages
+    }
+
+
+# dependency cohesion measures
+@measure("dcm_lcom3", "package_measures")
+def _dcm_lcom3(ctx, local):
+    return {p: local[p][1] for p in ctx.packages}
+
+
+@measure("dcm_sim", "package_measures")
+def _dcm_sim(ctx, local):
+    return {p: local[p][2] for p in ctx.packages}
+
+
+@measure("dcm_cc", "package_measures")
+def _dcm_cc(ctx, local):
+    return {p: local[p][3] for p in ctx.packages}
+
+
+# packages whose DCM_LCOM3 and DCM_SIM were estimated
+@measure("approximated", "package_measures")
+def _approximated(ctx, local):
+    return {p: local[p][4] for p in ctx.packages}
+
+
+# package depdegree based on the condensed graph
+@measure("p-depdegree", "condensation")
+def _pdd(ctx, cond):
+    return pdd_all(ctx.packages, ctx.depgraph, cond)
+
+
+# dependency locality based on the package tree
+@measure("dlm", "class_deps", "class_packages")
+def _dlm(ctx, class_deps, pkg_of):
+    return dlm_all(ctx.packages, class_deps, pkg_of)
+
+
+def calc_packages(
+    depgraph: dict,
+    packages: dict,
+    selected=None,
+    vectorized: bool = True,
+    workers: int = 1,
+    timings: dict = None,
+    approximate: Approximation = None,
+    names: list = None,
+    artifacts: dict = None,
+) -> dict:
+    """
+    Calculates the registered measures (default: all, cf. MEASURES) for the selected packages
+    (default: all packages)
+
+    packages must contain all packages of the dependency graph (cf. group_by_package).
+    With workers > 1, the packages are distributed across a pool of worker processes
+    (only on platforms supporting fork), the results do not depend on the number of workers.
+    If timings is given, the wall and CPU time spent per artifact and measure is added to it
+    (cf. instrument.timed, summed over all workers).
+    DCM_LCOM3 and DCM_SIM of packages larger than approximate.threshold are estimated
+    (cf. dcm_approx), the estimated packages are marked in the values of "approximated".
+    names may also contain artifacts (cf. ARTIFACTS), e.g. "package_matrix" to reuse it,
+    artifacts maps names to values calculated before (e.g. "condensation").
+    Returns a dict mapping each measure to the measurement values of the selected packages
+    (and each requested artifact to its value)
+    """
+
+    if vectorized:
+        try:
+            import numpy, scipy
+        except ImportError:
+            vectorized = False
+
+    if selected is None:
+        selected = packages
+    selected = {p: packages[p] for p in selected if p in packages}
+
+    ctx = Context(depgraph, packages, selected, vectorized, workers, timings, approximate, artifacts)
+
+    return {m: ctx[m] for m in (names if names is not None else MEASURES)}
+
+
+def store(results: dict, directory: str = "./data") -> None:
+    """
+    Stores the measurement values of each measure m under <directory>/<m>.json (sorted by value)
+    """
+
+    import os
+
+    for m, values in results.items():
+        od = OrderedDict(sorted(values.items(), key = lambda i: i[1]))
+        with open(os.path.join(directory, f"{m}.json"), "w") as f:
+            json.dump(od, f, indent = 4)
+
+
+def rollup_table(values: dict) -> dict:
+    """
+    Converts the values of rollup to a dict mapping each package (sorted by name)
+    to a dict of its measurement values
+    """
+
+    keys = ("noc", "ca", "ce", "instability")
+
+    return {p: dict(zip(keys, v)) for p, v in sorted(values.items())}
+
+
+def store_rollup(values: dict, directory: str = "./data") -> None:
+    """
+    Stores the measurement values of the package subtrees (cf. rollup) under <directory>/rollup.json
+    """
+
+    import os
+
+    with open(os.path.join(directory, "rollup.json"), "w") as f:
+        json.dump(rollup_table(values), f, indent=4)
+
+
+def calc(
+    vectorized: bool = True,
+    depgraph: dict = None,
+    workers: int = 1,
+    timings: dict = None,
+    approximate: Approximation = None,
+    class_level: bool = True,
+) -> dict:
     """
     Calculates all defined measures for all packages based on the dependency graph of a system
+
+    If vectorized is set, the dependency cohesion measures are calculated with NumPy/SciPy
+    (if installed), otherwise with the pure Python implementations.
+    workers is the number of worker processes, timings collects the time per measure
+    and approximate configures the estimation of DCM for large packages (cf. calc_packages).
+    If class_level is set, the class level measures are stored as well (cf. class_measures).
+    depgraph may be a dict or a graph.Graph, by default the dependency graph
+    stored in ./data is loaded (cf. graph.load)
+    Returns the measurement values
     """
 
-    depgraph = json.load(open("./data/depgraph.json", "r"))
+    from instrument import timed
+
+    if depgraph is None:
+        import graph
+
+        depgraph = graph.load()
 
     # group classes by packages
     packages = group_by_package(depgraph)
 
-    results = defaultdict(dict)
+    results = calc_packages(
+        depgraph,
+        packages,
+        vectorized=vectorized,
+        workers=workers,
+        timings=timings,
+        approximate=approximate,
+        names=list(MEASURES) + ["package_matrix", "condensation"],
+    )
+    matrix = results.pop("package_matrix")
+    cond = results.pop("condensation")
 
-    # calculate measures for all packages
-    for p, pkg_classes in packages.items():
-        # number of classes (and interfaces)
-        results["noc"][p] = noc(pkg_classes)
+    # store the measurement values
+    store(results)
 
-        # coupling measure
-        results["ca"][p] = ca(pkg_classes, depgraph)
-        results["ce"][p] = ce(pkg_classes, depgraph)
-        results["instability"][p] = instability(pkg_classes, depgraph)
+    # measures of the subtrees of the package hierarchy
+    store_rollup(timed(timings, "rollup", rollup, packages, depgraph))
 
-        # dependency cohesion measure
-        class_deps = [set(depgraph[c]) for c in pkg_classes]
+    # dependencies between packages
+    matrix.save()
 
-        results["dcm_lcom3"][p] = dcm_lcom3(class_deps)
-        results["dcm_sim"][p] = dcm_sim(class_deps)
-        results["dcm_cc"][p] = dcm_cc(class_deps)
+    # class and package cycles
+    import cycles
 
-        # package depdegree
-        results["p-depdegree"][p] = pdd(pkg_classes, depgraph)
+    cycles.store(timed(timings, "cycles", cycles.calc, depgraph, None, matrix, cond))
 
-        # dependency locality measure
-        pkg_deps = set().union(*[depgraph[c] for c in pkg_classes])
-        results["dlm"][p] = dlm(p, pkg_deps)
+    import class_measures
 
-    # store the measurement values
-    for m, values in results.items():
-        od = OrderedDict(sorted(values.items(), key = lambda i: i[1]))
-        json.dump(od, open(f"./data/{m}.json", "w"), indent = 4)
-     
+    if class_level:
+        class_measures.store(
+            timed(timings, "class_measures", class_measures.calc, depgraph, None, cond)
+        )
+    else:
+        class_measures.clear()
+
+    return results
 
 
 if __name__ == "__main__":
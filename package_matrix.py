@@ -0,0 +1,286 @@
+"""
+Package dependency matrix of Jade
+
+Sparse package x package matrix whose entry (p, q) is the number of class dependencies
+from classes of package p to classes of package q (the diagonal holds the dependencies
+within a package). It is stored in CSR format, i.e. row p (the packages p depends on)
+is indices[indptr[p] : indptr[p + 1]] with the counts data[indptr[p] : indptr[p + 1]],
+the columns (the packages depending on q) are looked up in the transposed matrix.
+"""
+
+import json
+import os
+from array import array
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# compressed NumPy archive (loadable with scipy.sparse.csr_matrix), JSON without NumPy
+MATRIX_PATH = "./data/package_matrix.npz"
+JSON_PATH = "./data/package_matrix.json"
+
+
+def default_path() -> str:
+    """
+    Returns the path the matrix is stored under by default (cf. PackageMatrix.save)
+    """
+
+    return MATRIX_PATH if np is not None else JSON_PATH
+
+
+def _transpose(n: int, indptr, indices, data) -> tuple:
+    # counting sort of the entries by column, the rows stay sorted within each column
+    counts = [0] * (n + 1)
+    for j in indices:
+        counts[j + 1] += 1
+    for j in range(n):
+        counts[j + 1] += counts[j]
+
+    t_indptr = array("q", counts)
+    t_indices = array("i", bytes(4 * len(indices)))
+    t_data = array("q", bytes(8 * len(indices)))
+
+    pos = counts[:-1]
+    for i in range(n):
+        for k in range(indptr[i], indptr[i + 1]):
+            j = indices[k]
+            t_indices[pos[j]] = i
+            t_data[pos[j]] = data[k]
+            pos[j] += 1
+
+    return t_indptr, t_indices, t_data
+
+
+class PackageMatrix:
+    """
+    Sparse matrix of the number of class dependencies between packages (cf. build)
+    """
+
+    def __init__(self, packages: list, indptr, indices, data):
+        self.packages = packages
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+        self.index = {p: i for i, p in enumerate(packages)}
+        self._transposed = None
+
+    @classmethod
+    def build(cls, depgraph: dict, packages: dict = None) -> "PackageMatrix":
+        """
+        Builds the matrix in one pass over the edges of the dependency graph
+
+        packages maps each package to its classes (default: cf. measures.group_by_package),
+        dependencies on classes outside of packages lie in the package given by their name.
+        For a graph.Graph (with default packages), the edges are counted with NumPy if installed.
+        """
+
+        if packages is None and np is not None and hasattr(depgraph, "pkg_of"):
+            return cls._build_vectorized(depgraph)
+
+        if packages is None:
+            from measures import group_by_package
+
+            packages = group_by_package(depgraph)
+
+        names = list(packages)
+        index = {p: i for i, p in enumerate(names)}
+        pkg_of = {c: index[p] for p, pkg_classes in packages.items() for c in pkg_classes}
+
+        rows = [{} for _ in names]
+
+        for i, p in enumerate(packages):
+            row = rows[i]
+
+            for c in packages[p]:
+                for d in depgraph[c]:
+                    j = pkg_of.get(d)
+
+                    if j is None:
+                        q = d.rpartition(".")[0]
+                        if q not in index:
+                            index[q] = len(names)
+                            names.append(q)
+                            rows.append({})
+                        j = pkg_of[d] = index[q]
+
+                    row[j] = row.get(j, 0) + 1
+
+        return cls.from_entries(
+            names, ((i, j, row[j]) for i, row in enumerate(rows) for j in sorted(row))
+        )
+
+    @classmethod
+    def from_entries(cls, packages: list, entries) -> "PackageMatrix":
+        """
+        Creates a matrix from the entries (row id, column id, count), sorted by row and column,
+        the ids refer to the list of packages
+        """
+
+        indptr = array("q", [0])
+        indices = array("i")
+        data = array("q")
+
+        for i, j, n in entries:
+            while len(indptr) <= i:
+                indptr.append(len(indices))
+            indices.append(j)
+            data.append(n)
+
+        while len(indptr) <= len(packages):
+            indptr.append(len(indices))
+
+        return cls(packages, indptr, indices, data)
+
+    @classmethod
+    def _build_vectorized(cls, depgraph) -> "PackageMatrix":
+        n = len(depgraph.packages)
+        pkg_of = np.asarray(depgraph.pkg_of, dtype=np.int64)
+        offsets = np.asarray(depgraph.offsets, dtype=np.int64)
+        targets = np.asarray(depgraph.targets, dtype=np.int64)
+
+        # entries sorted by row and column
+        sources = np.repeat(pkg_of, np.diff(offsets))
+        keys, data = np.unique(sources * n + pkg_of[targets], return_counts=True)
+        rows, indices = np.divmod(keys, n)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+        return cls(list(depgraph.packages), indptr, indices.astype(np.int32), data.astype(np.int64))
+
+    @classmethod
+    def load(cls, path: str = None) -> "PackageMatrix":
+        """
+        Loads a matrix stored with save
+        """
+
+        path = path or default_path()
+
+        if path.endswith(".json"):
+            with open(path) as f:
+                m = json.load(f)
+
+            return cls(
+                m["packages"],
+                array("q", m["indptr"]),
+                array("i", m["indices"]),
+                array("q", m["data"]),
+            )
+
+        with np.load(path) as m:
+            return cls(m["packages"].tolist(), m["indptr"], m["indices"], m["data"])
+
+    def save(self, path: str = None) -> str:
+        """
+        Stores the matrix as compressed NumPy archive or, if the path ends with .json, as JSON
+        (default: cf. default_path)
+
+        Returns the path
+        """
+
+        path = path or default_path()
+
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(
+                    {
+                        "packages": self.packages,
+                        "indptr": list(self.indptr),
+                        "indices": list(self.indices),
+                        "data": list(self.data),
+                    },
+                    f,
+                )
+        else:
+            # np.savez appends .npz to other names
+            with open(path + ".tmp", "wb") as f:
+                np.savez_compressed(
+                    f,
+                    packages=np.asarray(self.packages, dtype=str),
+                    indptr=np.asarray(self.indptr, dtype=np.int64),
+                    indices=np.asarray(self.indices, dtype=np.int32),
+                    data=np.asarray(self.data, dtype=np.int64),
+                )
+            os.replace(path + ".tmp", path)
+
+        return path
+
+    def to_scipy(self):
+        """
+        Returns the matrix as scipy.sparse.csr_matrix (requires SciPy)
+        """
+
+        from scipy import sparse
+
+        n = len(self.packages)
+
+        return sparse.csr_matrix(
+            (np.asarray(self.data), np.asarray(self.indices), np.asarray(self.indptr)), shape=(n, n)
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Returns the package graph, i.e. a dict mapping each package to a dict
+        (package it depends on -> number of class dependencies) without the diagonal
+        """
+
+        return {p: self.dependencies(p) for p in self.packages}
+
+    def _row(self, indptr, indices, data, p: str) -> dict:
+        i = self.index[p]
+        start, end = int(indptr[i]), int(indptr[i + 1])
+        packages = self.packages
+
+        return {
+            packages[j]: int(n)
+            for j, n in zip(indices[start:end], data[start:end])
+            if j != i
+        }
+
+    @property
+    def transposed(self) -> tuple:
+        """
+        CSR arrays (indptr, indices, data) of the transposed matrix (built on first use)
+        """
+
+        if self._transposed is None:
+            self._transposed = _transpose(len(self.packages), self.indptr, self.indices, self.data)
+
+        return self._transposed
+
+    def dependencies(self, p: str) -> dict:
+        """
+        Returns the packages p depends on with the number of class dependencies (row of p)
+        """
+
+        return self._row(self.indptr, self.indices, self.data, p)
+
+    def dependents(self, p: str) -> dict:
+        """
+        Returns the packages depending on p with the number of class dependencies (column of p)
+        """
+
+        return self._row(*self.transposed, p)
+
+    def weight(self, p: str, q: str) -> int:
+        """
+        Returns the number of class dependencies from package p to package q
+        """
+
+        i, j = self.index[p], self.index[q]
+        start, end = int(self.indptr[i]), int(self.indptr[i + 1])
+        k = bisect_left(self.indices, j, start, end)
+
+        return int(self.data[k]) if k < end and self.indices[k] == j else 0
+
+    def coupling(self, p: str) -> tuple:
+        """
+        Returns the weighted coupling of package p, i.e. a tuple (number of class dependencies
+        from other packages on p, number of class dependencies of p on other packages)
+        """
+
+        return sum(self.dependents(p).values()), sum(self.dependencies(p).values())
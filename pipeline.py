@@ -0,0 +1,191 @@
+"""
+Programmatic pipeline of Jade, e.g.
+
+    import pipeline
+
+    g = pipeline.build_graph("./data/x.jar.dot", "org.x")
+    results = pipeline.calculate(g)
+    path = pipeline.report(g, results, "org.x", "./data/x.jar.dot", plots=False)
+
+Each stage returns an in-memory object that the next stage consumes directly,
+only the report is written (to ./reports, the graphs to ./graphs, created if necessary).
+The graph and the measurement values can be stored like in main.py with the sinks
+store_graph and store_results. All files are written relative to the directory output
+(default: the working directory).
+"""
+
+from collections import namedtuple
+
+from config import DENYLIST, DOMAIN, DOTFILE_PATH, PLOTS, ROLLUP_DEPTH
+
+# values: measure -> package -> value (cf. measures.calc_packages)
+# rollup: package -> (NOC, Ca, Ce, I) of the package subtree (cf. measures.rollup)
+# matrix: number of class dependencies between packages (cf. package_matrix.PackageMatrix)
+# cycles: class and package cycles (cf. cycles.calc)
+# classes: class -> (fan-in, fan-out, dependencies, dependents) or None (cf. class_measures.calc)
+Results = namedtuple("Results", ["values", "rollup", "matrix", "cycles", "classes"])
+
+
+def build_graph(dotfile: str = DOTFILE_PATH, domain: str = DOMAIN, denylist: list = DENYLIST):
+    """
+    Builds the refined dependency graph of a project from its dot file
+
+    Returns the dependency graph (cf. graph.Graph)
+    """
+
+    import depgraph
+    from graph import Graph
+
+    valid = depgraph.validator(domain, denylist)
+
+    return Graph.from_dict(depgraph.build_streaming(depgraph.iter_deps(dotfile), valid))
+
+
+def calculate(
+    depgraph,
+    vectorized: bool = True,
+    workers: int = 1,
+    timings: dict = None,
+    approximate=None,
+    names: list = None,
+    class_level: bool = True,
+) -> Results:
+    """
+    Calculates the measures of all packages, of the package subtrees, the package dependency matrix,
+    the dependency cycles and, if class_level is set, the measures of all classes
+    (cf. measures.calc_packages, measures.rollup, package_matrix, cycles.calc and class_measures.calc)
+    """
+
+    from instrument import timed
+    import cycles
+    import measures
+
+    packages = measures.group_by_package(depgraph)
+
+    values = measures.calc_packages(
+        depgraph,
+        packages,
+        vectorized=vectorized,
+        workers=workers,
+        timings=timings,
+        approximate=approximate,
+        names=(list(names) if names is not None else list(measures.MEASURES))
+        + ["package_matrix", "condensation"],
+    )
+    matrix = values.pop("package_matrix")
+    cond = values.pop("condensation")
+
+    rollup = timed(timings, "rollup", measures.rollup, packages, depgraph)
+    cyc = timed(timings, "cycles", cycles.calc, depgraph, None, matrix, cond)
+
+    classes = None
+    if class_level:
+        import class_measures
+
+        classes = timed(timings, "class_measures", class_measures.calc, depgraph, None, cond)
+
+    return Results(values, rollup, matrix, cyc, classes)
+
+
+def report(
+    depgraph,
+    results: Results,
+    domain: str = DOMAIN,
+    dotfile: str = DOTFILE_PATH,
+    denylist: list = DENYLIST,
+    plots: bool = PLOTS,
+    workers: int = 1,
+    rollup_depth: int = ROLLUP_DEPTH,
+    output: str = ".",
+) -> str:
+    """
+    Generates the report (and the graphs if plots is set) of the results, cf. report.generate
+
+    Returns the path of the report
+    """
+
+    import report as rep
+
+    rep.use(depgraph, results.values, results.rollup, results.classes, results.cycles)
+
+    try:
+        return rep.generate(plots, workers, domain, dotfile, denylist, rollup_depth, output)
+    finally:
+        rep.unload()
+
+
+def store_graph(depgraph, export_json: bool = False, output: str = ".") -> None:
+    """
+    Stores the dependency graph in <output>/data like depgraph.build_from_dotfile
+    """
+
+    import json
+    import os
+
+    from graph import Graph, GRAPH_PATH, JSON_PATH
+
+    if not isinstance(depgraph, Graph):
+        depgraph = Graph.from_dict(depgraph)
+
+    directory = os.path.join(output, "data")
+    os.makedirs(directory, exist_ok=True)
+    depgraph.save(os.path.join(directory, os.path.basename(GRAPH_PATH)))
+
+    if export_json:
+        with open(os.path.join(directory, os.path.basename(JSON_PATH)), "w") as f:
+            json.dump(depgraph.to_dict(), f, indent=4)
+
+
+def store_results(results: Results, output: str = ".") -> None:
+    """
+    Stores the measurement values in <output>/data like measures.calc
+    """
+
+    import os
+
+    import class_measures
+    import cycles
+    import measures
+    import package_matrix
+
+    directory = os.path.join(output, "data")
+    os.makedirs(directory, exist_ok=True)
+
+    measures.store(results.values, directory)
+    measures.store_rollup(results.rollup, directory)
+    results.matrix.save(os.path.join(directory, os.path.basename(package_matrix.default_path())))
+    cycles.store(results.cycles, directory)
+
+    if results.classes is not None:
+        class_measures.store(results.classes, directory)
+    else:
+        class_measures.clear(directory)
+
+
+def run(
+    dotfile: str = DOTFILE_PATH,
+    domain: str = DOMAIN,
+    denylist: list = DENYLIST,
+    plots: bool = PLOTS,
+    workers: int = 1,
+    vectorized: bool = True,
+    store: bool = False,
+    output: str = ".",
+) -> tuple:
+    """
+    Runs the whole pipeline for a project,
+    if store is set, the graph and the measurement values are additionally stored in <output>/data
+
+    Returns a tuple (dependency graph, results, path of the report)
+    """
+
+    depgraph = build_graph(dotfile, domain, denylist)
+    results = calculate(depgraph, vectorized, workers)
+
+    if store:
+        store_graph(depgraph, output=output)
+        store_results(results, output)
+
+    return depgraph, results, report(
+        depgraph, results, domain, dotfile, denylist, plots, workers, output=output
+    )
@@ -1,12 +1,10 @@
 import json
+import os
 from collections import defaultdict, namedtuple
 from datetime import datetime
 
-import matplotlib.pyplot as plt
-import seaborn as sn
-import pandas as pd
-
-from config import DOMAIN, DOTFILE_PATH, DENYLIST
+import graph
+from config import DOMAIN, DOTFILE_PATH, DENYLIST, ROLLUP_DEPTH
 
 
 Measure = namedtuple("Measure", ["label", "color"])
@@ -23,75 +21,195 @@ MEASURES = {
     "dlm": Measure("DLM", "gold"),
 }
 
-DEPGRAPH = json.load(open("./data/depgraph.json"))
-DATA = {m: json.load(open(f"./data/{m}.json")) for m in MEASURES}
+_loaded = {}
+
+
+def load() -> tuple:
+    """
+    Loads the dependency graph and the measurement values (on first use only)
+
+    The marks of approximated values, the measures of the package subtrees,
+    the dependency cycles and the class level measures are loaded if they exist.
+    Returns a tuple (DEPGRAPH, DATA)
+    """
+
+    if not _loaded:
+        _loaded["DEPGRAPH"] = graph.load()
+        _loaded["DATA"] = {}
+        _loaded["ROLLUP"] = None
+        _loaded["CYCLES"] = None
+        _loaded["CLASSES"] = None
+
+        for m in MEASURES:
+            with open(f"./data/{m}.json") as f:
+                _loaded["DATA"][m] = json.load(f)
+
+        if os.path.exists("./data/approximated.json"):
+            with open("./data/approximated.json") as f:
+                _loaded["DATA"]["approximated"] = json.load(f)
+
+        if os.path.exists("./data/rollup.json"):
+            with open("./data/rollup.json") as f:
+                _loaded["ROLLUP"] = json.load(f)
+
+        from cycles import CYCLES_PATH
+
+        if os.path.exists(CYCLES_PATH):
+            with open(CYCLES_PATH) as f:
+                _loaded["CYCLES"] = json.load(f)
+
+        from class_measures import CLASSES_PATH
+
+        if os.path.exists(CLASSES_PATH):
+            with open(CLASSES_PATH) as f:
+                _loaded["CLASSES"] = json.load(f)
+
+    return _loaded["DEPGRAPH"], _loaded["DATA"]
+
+
+def use(depgraph: dict, data: dict, rollup: dict = None, classes: dict = None, cycles=None) -> None:
+    """
+    Uses the given dependency graph, measurement values, measures of the package subtrees
+    (cf. measures.rollup), class level measures (cf. class_measures.calc)
+    and dependency cycles (cf. cycles.calc) instead of loading them from ./data
+    """
+
+    from class_measures import KEYS
+    from cycles import as_dict
+    from measures import rollup_table
+
+    _loaded.clear()
+    _loaded["DEPGRAPH"] = depgraph
+    _loaded["DATA"] = data
+    _loaded["ROLLUP"] = rollup_table(rollup) if rollup is not None else None
+    _loaded["CYCLES"] = as_dict(cycles) if cycles is not None else None
+    _loaded["CLASSES"] = (
+        {c: dict(zip(KEYS, v)) for c, v in classes.items()} if classes is not None else None
+    )
+
+
+def unload() -> None:
+    """
+    Drops the loaded data, e.g. before generating the report of another project
+    """
+
+    _loaded.clear()
+
 
+def __getattr__(name: str):
+    # DEPGRAPH and DATA are loaded lazily on first access
+    if name in ("DEPGRAPH", "DATA"):
+        load()
+        return _loaded[name]
 
-def plot_measurement_values(m: str):
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# graphs comparing the sorted values of the first measure with the values of the second measure
+COMPARISONS = [
+    ("noc", "ce"),
+    ("dcm_cc", "noc"),
+    ("dcm_cc", "ce"),
+    ("dcm_cc", "dcm_lcom3"),
+    ("noc", "dcm_lcom3"),
+]
+
+
+def sorted_values(m: str) -> list:
+    """
+    Returns the (package, value) pairs of measure m sorted by value
+
+    Each measure is sorted only once
+    """
+
+    _, DATA = load()
+    cache = _loaded.setdefault("SORTED", {})
+
+    if m not in cache:
+        cache[m] = sorted(DATA[m].items(), key=lambda i: i[1])
+
+    return cache[m]
+
+
+def _figure():
+    """
+    Creates a figure that is not managed by pyplot (so no interactive backend is involved)
+    """
+
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    return fig, fig.add_subplot()
+
+
+def plot_measurement_values(m: str, directory: str = "./graphs"):
     """
     Plots the sorted measurement values for measure m
-    and stores the graph under ./graphs/<m>.png
+    and stores the graph under <directory>/<m>.png
     """
 
-    data = DATA[m]
+    data = sorted_values(m)
     label, color = MEASURES[m]
 
+    fig, ax = _figure()
+
     xvalues = [i for i in range(len(data))]
     # Plot graphs
-    plt.plot(
+    ax.plot(
         xvalues,
-        [y for _, y in sorted(data.items(), key=lambda i: i[1])],
+        [y for _, y in data],
         "o",
         label=label,
         color=color,
         markersize=1,
     )
-    plt.legend()
-    plt.ylabel("measurement values")
-    plt.xlabel("packages")
+    ax.legend()
+    ax.set_ylabel("measurement values")
+    ax.set_xlabel("packages")
 
-    # plt.show()
-    plt.savefig(f"./graphs/{m}.png")
-    plt.close()
+    fig.savefig(os.path.join(directory, f"{m}.png"))
 
 
-def plot_comparison(m1: str, m2: str):
+def plot_comparison(m1: str, m2: str, directory: str = "./graphs"):
     """
     Plots the sorted measurement values for measure m1
     and the corresponding measurement values for m2
-    and stores the graph under ./graphs/<m1>_and_<m2>.png
+    and stores the graph under <directory>/<m1>_and_<m2>.png
     """
-    data_m1 = DATA[m1]
+
+    _, DATA = load()
+
+    data_m1 = sorted_values(m1)
     label_m1, color_m1 = MEASURES[m1]
 
     data_m2 = DATA[m2]
     label_m2, color_m2 = MEASURES[m2]
 
+    fig, ax = _figure()
+
     xvalues = [i for i in range(len(data_m1))]
     # Plot graphs
-    plt.plot(
+    ax.plot(
         xvalues,
-        [y for _, y in sorted(data_m1.items(), key=lambda i: i[1])],
+        [y for _, y in data_m1],
         "o",
         label=label_m1,
         color=color_m1,
         markersize=1,
     )
-    plt.plot(
+    ax.plot(
         xvalues,
-        [data_m2[p] for p, _ in sorted(data_m1.items(), key=lambda i: i[1])],
+        [data_m2[p] for p, _ in data_m1],
         "o",
         label=label_m2,
         color=color_m2,
         markersize=1,
     )
-    plt.legend()
-    plt.ylabel("measurement values")
-    plt.xlabel("packages")
+    ax.legend()
+    ax.set_ylabel("measurement values")
+    ax.set_xlabel("packages")
 
-    # plt.show()
-    plt.savefig(f"./graphs/{m1}_and_{m2}.png")
-    plt.close()
+    fig.savefig(os.path.join(directory, f"{m1}_and_{m2}.png"))
 
 
 def table(head: tuple, body: list):
@@ -109,14 +227,115 @@ def table(head: tuple, body: list):
     return table
 
 
-def generate():
+def plot_correlation_matrix(packages: list, directory: str = "./graphs"):
+    """
+    Plots the pearson correlation matrix of all measures
+    and stores it under <directory>/corr_matrix.png
+    """
+
+    import seaborn as sn
+    import pandas as pd
+
+    _, DATA = load()
+
+    corr_data = {}
+
+    for m in sorted(MEASURES.keys()):
+        corr_data[MEASURES[m].label] = [DATA[m][p] for p in sorted(packages)]
+
+    df = pd.DataFrame(corr_data, columns=[MEASURES[m].label for m in sorted(MEASURES.keys())])
+
+    fig, ax = _figure()
+
+    corrMatrix = df.corr(method="pearson")
+    sn.heatmap(corrMatrix, annot=True, ax=ax)
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.savefig(os.path.join(directory, "corr_matrix.png"), bbox_inches="tight")
+
+
+def graph_paths(directory: str = "./graphs") -> list:
+    """
+    Returns the paths of all graphs created by render
+    """
+
+    names = [f"{m}.png" for m in MEASURES]
+    names += [f"{m1}_and_{m2}.png" for m1, m2 in COMPARISONS]
+    names.append("corr_matrix.png")
+
+    return [os.path.join(directory, n) for n in names]
+
+
+def _render(job: tuple):
+    plot, args = job
+    plot(*args)
+
+
+def render(packages: list, workers: int = 1, directory: str = "./graphs"):
+    """
+    Renders all graphs with the non-interactive Agg backend into directory
+
+    With workers > 1, the graphs are rendered concurrently by forked worker processes
+    (only on platforms supporting fork), which inherit the loaded and sorted measurement values
+    """
+
+    import multiprocessing
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    os.makedirs(directory, exist_ok=True)
+
+    # load and sort all measures before forking
+    for m in MEASURES:
+        sorted_values(m)
+
+    jobs = [(plot_measurement_values, (m, directory)) for m in MEASURES]
+    jobs += [(plot_comparison, (*c, directory)) for c in COMPARISONS]
+    jobs.append((plot_correlation_matrix, (packages, directory)))
+
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        from concurrent.futures import ProcessPoolExecutor
+
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(min(workers, len(jobs)), mp_context=ctx) as pool:
+            list(pool.map(_render, jobs))
+    else:
+        for job in jobs:
+            _render(job)
+
+
+def generate(
+    plots: bool = True,
+    workers: int = 1,
+    domain: str = DOMAIN,
+    dotfile: str = DOTFILE_PATH,
+    denylist: list = DENYLIST,
+    rollup_depth: int = ROLLUP_DEPTH,
+    output: str = ".",
+):
+    """
+    Generates the report (and the graphs if plots is set)
+    in the folders reports (and graphs) of the directory output
+
+    Without plots, the plotting libraries are not imported at all.
+    workers is the number of processes rendering the graphs (cf. render).
+    domain, dotfile and denylist describe the project (default: config.py).
+    If rollup_depth is not None, the measures of the package subtrees rollup_depth levels
+    below the domain are listed (cf. measures.rollup).
+    The data is loaded from ./data unless given before (cf. use).
+    Returns the path of the report
+    """
+
+    DEPGRAPH, DATA = load()
+
     # lambdas
     write = (
         lambda x: report.write(x + "\n")
         if isinstance(x, str)
         else report.writelines([l + "\n" for l in x])
     )
-    only_pkg = lambda x: x[len(DOMAIN) + 1 :] if x.startswith(DOMAIN) else x
+    only_pkg = lambda x: x[len(domain) + 1 :] if x.startswith(domain) else x
 
     # group classes by packages
     packages = defaultdict(list)
@@ -125,42 +344,27 @@ def generate():
         p = c.rpartition(".")[0]
         packages[p].append(c)
 
-    # create graphs
-    for m in MEASURES:
-        plot_measurement_values(m)
-
-    plot_comparison("noc", "ce")
-    plot_comparison("dcm_cc", "noc")
-    plot_comparison("dcm_cc", "ce")
-    plot_comparison("dcm_cc", "dcm_lcom3")
-    plot_comparison("noc", "dcm_lcom3")
-
-    # create correlation matrix
-    corr_data = {}
-
-    for m in sorted(MEASURES.keys()):
-        corr_data[MEASURES[m].label] = [DATA[m][p] for p in sorted(packages.keys())]
-
-    df = pd.DataFrame(corr_data, columns=[MEASURES[m].label for m in sorted(MEASURES.keys())])
-
-    corrMatrix = df.corr(method="pearson")
-    sn.heatmap(corrMatrix, annot=True)
-    plt.xticks(rotation=45)
-    plt.savefig("./graphs/corr_matrix.png", bbox_inches="tight")
+    if plots:
+        # create graphs and correlation matrix
+        render(list(packages), workers, os.path.join(output, "graphs"))
 
     # generate report
     date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    report = open(f"./reports/{DOMAIN} - {date}.md", "w")
+    os.makedirs(os.path.join(output, "reports"), exist_ok=True)
+    path = os.path.join(output, "reports", f"{domain} - {date}.md")
+    report = open(path, "w")
 
     write("# Report")
     write(
-        f"This report for the software system with domain {DOMAIN} was created at {date} based on dot file *{DOTFILE_PATH}*."
+        f"This report for the software system with domain {domain} was created at {date} based on dot file *{dotfile}*."
     )
 
     write("## Graphs & Data")
-    write("- Data sets for all measures can be found in the folder *./data*")
-    write("- Graphs for all measures can be found in the folder *./graphs*")
-    write("- Correlation matrix for all measures  can be found in the folder *./graphs*")
+    write(f"- Data sets for all measures can be found in the folder *{os.path.join(output, 'data')}*")
+    if plots:
+        graphs = os.path.join(output, "graphs")
+        write(f"- Graphs for all measures can be found in the folder *{graphs}*")
+        write(f"- Correlation matrix for all measures  can be found in the folder *{graphs}*")
 
     # general information
     write("## General Information")
@@ -170,13 +374,13 @@ def generate():
     nested_classes = [c for c in DEPGRAPH if "$" in c]
     write(f"- Number of nested classes: {len(nested_classes)}")
 
-    deps = [(c, d) for c, deps in DEPGRAPH.items() for d in deps]
-    write(f"- Number of dependencies: {len(deps)}")
+    num_deps = sum(len(deps) for deps in DEPGRAPH.values())
+    write(f"- Number of dependencies: {num_deps}")
 
     # deny list
     write("## Deny List")
     write("Elements of the deny list:")
-    for d in DENYLIST:
+    for d in denylist:
         write(f"- {d}")
 
     # measures
@@ -197,7 +401,7 @@ def generate():
     write("- The 5 packages with highest NOC:")
     noc_top5 = [
         (only_pkg(p), v)
-        for p, v in list(reversed(sorted(DATA["noc"].items(), key=lambda i: i[1])))[:5]
+        for p, v in list(reversed(sorted_values("noc")))[:5]
     ]
     write(table(("Packages", "NOC"), noc_top5))
 
@@ -210,7 +414,7 @@ def generate():
     write("- The 5 packages with highest Ca (+ corresponding Ce and I values):")
     ca_top5 = [
         (only_pkg(p), v, DATA["ce"][p], round(DATA["instability"][p], 3))
-        for p, v in list(reversed(sorted(DATA["ca"].items(), key=lambda i: i[1])))[:5]
+        for p, v in list(reversed(sorted_values("ca")))[:5]
     ]
     write(table(("Packages", "Ca", "Ce", "I"), ca_top5))
 
@@ -223,7 +427,7 @@ def generate():
     write("- The 5 packages with highest Ce (+ corresponding Ca and I values):")
     ce_top5 = [
         (only_pkg(p), v, DATA["ca"][p], round(DATA["instability"][p], 3))
-        for p, v in list(reversed(sorted(DATA["ce"].items(), key=lambda i: i[1])))[:5]
+        for p, v in list(reversed(sorted_values("ce")))[:5]
     ]
     write(table(("Packages", "Ce", "Ca", "I"), ca_top5))
 
@@ -239,14 +443,23 @@ def generate():
     write("- The 5 packages with highest I:")
     i_top5 = [
         (only_pkg(p), round(v, 3))
-        for p, v in list(
-            reversed(sorted(DATA["instability"].items(), key=lambda i: i[1]))
-        )[:5]
+        for p, v in list(reversed(sorted_values("instability")))[:5]
     ]
     write(table(("Packages", "I"), i_top5))
 
     # statistics regarding dcm_lcom3
     write("### Dependency Cohesion Measures (DCM)")
+
+    # packages whose DCM_LCOM3 and DCM_SIM were estimated (cf. measures.dcm_approx)
+    approximated = {p for p, v in DATA.get("approximated", {}).items() if v}
+
+    mark = lambda p, v: f"{v}*" if p in approximated else v
+
+    if approximated:
+        write(
+            f"- DCM<sub>LCOM3</sub> and DCM<sub>SIM</sub> of {len(approximated)} large packages are approximated (marked with *)"
+        )
+
     write("#### DCM based on LCOM3 (DCM<sub>LCOM3</sub>)")
 
     dcm_lcom3_avg = round(sum(DATA["dcm_lcom3"].values()) / len(DATA["dcm_lcom3"]), 0)
@@ -254,10 +467,8 @@ def generate():
 
     write("- The 5 packages with highest DCM<sub>LCOM3</sub>:")
     dcm_lcom3_top5 = [
-        (only_pkg(p), v)
-        for p, v in list(
-            reversed(sorted(DATA["dcm_lcom3"].items(), key=lambda i: i[1]))
-        )[:5]
+        (only_pkg(p), mark(p, v))
+        for p, v in list(reversed(sorted_values("dcm_lcom3")))[:5]
     ]
     write(table(("Packages", "DCM<sub>LCOM3</sub>"), dcm_lcom3_top5))
 
@@ -268,10 +479,8 @@ def generate():
         "- The 5 packages with highest DCM<sub>SIM</sub> (+ corresponding DCM<sub>CC</sub> value):"
     )
     dcm_sim_top5 = [
-        (only_pkg(p), round(v, 3), round(DATA["dcm_cc"][p], 3))
-        for p, v in list(reversed(sorted(DATA["dcm_sim"].items(), key=lambda i: i[1])))[
-            :5
-        ]
+        (only_pkg(p), mark(p, round(v, 3)), round(DATA["dcm_cc"][p], 3))
+        for p, v in list(reversed(sorted_values("dcm_sim")))[:5]
     ]
     write(table(("Packages", "DCM<sub>SIM</sub>", "DCM<sub>CC</sub>"), dcm_sim_top5))
 
@@ -282,10 +491,8 @@ def generate():
         "- The 5 packages with highest DCM<sub>CC</sub> (+ corresponding DCM<sub>SIM</sub> value):"
     )
     dcm_cc_top5 = [
-        (only_pkg(p), round(v, 3), round(DATA["dcm_sim"][p], 3))
-        for p, v in list(reversed(sorted(DATA["dcm_cc"].items(), key=lambda i: i[1])))[
-            :5
-        ]
+        (only_pkg(p), round(v, 3), mark(p, round(DATA["dcm_sim"][p], 3)))
+        for p, v in list(reversed(sorted_values("dcm_cc")))[:5]
     ]
     write(table(("Packages", "DCM<sub>CC</sub>", "DCM<sub>SIM</sub>"), dcm_cc_top5))
 
@@ -295,9 +502,7 @@ def generate():
     write("5 packages with highest P-DepDegree:")
     pdd_top5 = [
         (only_pkg(p), round(v, 3))
-        for p, v in list(
-            reversed(sorted(DATA["p-depdegree"].items(), key=lambda i: i[1]))
-        )[:5]
+        for p, v in list(reversed(sorted_values("p-depdegree")))[:5]
     ]
     write(table(("Packages", "P-DepDegree"), pdd_top5))
 
@@ -310,12 +515,100 @@ def generate():
     write("- The 5 packages with highest DLM (+ corresponding NOC and Ce values):")
     dlm_top5 = [
         (only_pkg(p), v, DATA["noc"][p], DATA["ce"][p])
-        for p, v in list(reversed(sorted(DATA["dlm"].items(), key=lambda i: i[1])))[:5]
+        for p, v in list(reversed(sorted_values("dlm")))[:5]
     ]
     write(table(("Packages", "DLM", "NOC", "Ce"), dlm_top5))
 
+    # measures of the package subtrees
+    rollup = _loaded["ROLLUP"]
+
+    if rollup_depth is not None and rollup is not None:
+        write("### Package Hierarchy")
+
+        depth = (domain.count(".") + 1 if domain else 0) + rollup_depth
+        subtrees = [
+            (only_pkg(p) or p, v["noc"], v["ca"], v["ce"], round(v["instability"], 3))
+            for p, v in rollup.items()
+            if p.startswith(domain) and p.count(".") + 1 == depth
+        ]
+
+        write(
+            f"- Measures of the {len(subtrees)} packages {rollup_depth} level(s) below the domain, "
+            "including all their subpackages:"
+        )
+        write(table(("Packages", "NOC", "Ca", "Ce", "I"), subtrees))
+
+    # dependency cycles
+    cycles = _loaded["CYCLES"]
+
+    if cycles is not None:
+        write("### Dependency Cycles")
+
+        in_cycles = sum(len(c) for c in cycles["classes"])
+        write(
+            f"- Number of class cycles: {len(cycles['classes'])} ({in_cycles} classes, "
+            f"largest: {len(cycles['classes'][0]) if cycles['classes'] else 0} classes)"
+        )
+        write(
+            f"- Number of package cycles: {len(cycles['packages'])} "
+            f"({sum(len(c['packages']) for c in cycles['packages'])} packages)"
+        )
+
+        if cycles["packages"]:
+            write(
+                "- The 5 largest package cycles, the number of dependencies of a minimal set breaking them "
+                "(+ number of class dependencies) and the heaviest of these (cf. ./data/cycles.json):"
+            )
+
+            def names(items):
+                return ", ".join(items[:5]) + (", ..." if len(items) > 5 else "")
+
+            largest = [
+                (
+                    len(c["packages"]),
+                    names([only_pkg(p) or p for p in c["packages"]]),
+                    f"{len(c['breaking'])} ({sum(n for *_, n in c['breaking'])})",
+                    names([f"{only_pkg(p) or p} -> {only_pkg(q) or q} ({n})" for p, q, n in c["breaking"]]),
+                )
+                for c in cycles["packages"][:5]
+            ]
+            write(table(("Size", "Packages", "Breaking", "Breaking dependencies"), largest))
+
+        if in_cycles > 0:
+            write("- The 5 packages with most classes in class cycles (+ size of their package cycle):")
+            tangled = sorted(cycles["size"].items(), key=lambda i: i[1]["classes"], reverse=True)[:5]
+            write(
+                table(
+                    ("Packages", "Classes in cycles", "Package cycle"),
+                    [(only_pkg(p) or p, v["classes"], v["cycle"]) for p, v in tangled],
+                )
+            )
+
+    # class level measures
+    classes = _loaded["CLASSES"]
+
+    if classes is not None:
+        write("### Classes")
+
+        def top5(key):
+            ranked = sorted(classes.items(), key=lambda i: i[1][key], reverse=True)[:5]
+            return [
+                (only_pkg(c), v["fan_in"], v["fan_out"], v["dependencies"], v["dependents"])
+                for c, v in ranked
+            ]
+
+        columns = ("Classes", "Fan-in", "Fan-out", "Dependencies", "Dependents")
+
+        write("- The 5 classes with highest fan-in:")
+        write(table(columns, top5("fan_in")))
+
+        write("- The 5 classes with most transitive dependents:")
+        write(table(columns, top5("dependents")))
+
     report.close()
 
+    return path
+
 
 if __name__ == "__main__":
     generate()
\ No newline at end of file
@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# comp_of: class -> id of its strongly connected component
+# members: component id -> list of classes
+# dag: component id -> set of successor components (condensation DAG)
+# weight: component id -> number of edges leaving the classes of the component
+Condensation = namedtuple("Condensation", ["comp_of", "members", "dag", "weight"])
+
+
+def components(depgraph: dict) -> tuple:
+    """
+    Determines the strongly connected components of the dependency graph
+    with an iterative version of Tarjan's algorithm
+
+    Components are numbered in reverse topological order,
+    i.e. all successors of a component have a smaller id than the component itself.
+    Returns a tuple (comp_of, members)
+    """
+
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+
+    comp_of = {}
+    members = []
+
+    for root in depgraph:
+        if root in index:
+            continue
+
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(depgraph.get(root, ())))]
+
+        while work:
+            v, it = work[-1]
+
+            for w in it:
+                if w not in index:
+                    # descend into w
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(depgraph.get(w, ()))))
+                    break
+                elif w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                # all successors of v are done
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+
+                if low[v] == index[v]:
+                    comp = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        comp_of[w] = len(members)
+                        comp.append(w)
+                        if w == v:
+                            break
+                    members.append(comp)
+
+    return comp_of, members
+
+
+def condense(depgraph: dict) -> Condensation:
+    """
+    Condenses the dependency graph into the DAG of its strongly connected components
+    """
+
+    comp_of, members = components(depgraph)
+
+    dag = []
+    weight = []
+
+    for i, comp in enumerate(members):
+        succ = set()
+        edges = 0
+
+        for c in comp:
+            deps = depgraph.get(c, ())
+            edges += len(deps)
+            succ.update(comp_of[d] for d in deps)
+
+        succ.discard(i)
+        dag.append(succ)
+        weight.append(edges)
+
+    return Condensation(comp_of, members, dag, weight)
+
+
+def reachability(cond: Condensation) -> list:
+    """
+    Calculates the set of components reachable from each component (including itself)
+
+    The sets are stored as bitsets (ints), bit i being set if component i is reachable.
+    As successors have smaller ids, one pass in ascending order suffices.
+    """
+
+    reach = []
+
+    for i, succ in enumerate(cond.dag):
+        r = 1 << i
+        for j in succ:
+            r |= reach[j]
+        reach.append(r)
+
+    return reach
+
+
+def reached_weight(mask: int, weight: list) -> int:
+    """
+    Sums up the weights of all components in the bitset mask
+    """
+
+    if np is not None:
+        n = len(weight)
+        bits = np.unpackbits(
+            np.frombuffer(mask.to_bytes((n + 7) // 8, "little"), dtype=np.uint8),
+            bitorder="little",
+        )[:n]
+        return int(np.dot(bits, np.asarray(weight, dtype=np.int64)))
+
+    bits = bin(mask)[:1:-1]
+    return sum(weight[i] for i, b in enumerate(bits) if b == "1")
@@ -0,0 +1,440 @@
+"""
+SQLite backend of Jade for dependency graphs that do not fit in memory
+
+The refined dependency graph is streamed from the dot file into a SQLite database
+(./data/depgraph.db) and the measures are calculated with set-based queries,
+so only the packages (and the classes of one package at a time) are held in memory.
+"""
+
+import os
+import sqlite3
+from collections import defaultdict
+from collections.abc import Mapping
+from itertools import groupby
+
+from config import DOTFILE_PATH
+
+DB_PATH = "./data/depgraph.db"
+
+# classes are numbered in the order they are found in the dot file (as in depgraph.build_streaming),
+# edges keep the order (and duplicates) of the dot file
+SCHEMA = """
+CREATE TABLE packages (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE classes (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, package INTEGER NOT NULL);
+CREATE TABLE edges (source INTEGER NOT NULL, target INTEGER NOT NULL);
+CREATE TEMP TABLE staged_classes (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, package TEXT NOT NULL);
+CREATE TEMP TABLE staged_edges (source TEXT NOT NULL, target TEXT NOT NULL);
+"""
+
+INDEXES = """
+CREATE INDEX edges_source ON edges (source);
+CREATE INDEX edges_target ON edges (target);
+CREATE INDEX classes_package ON classes (package);
+"""
+
+
+class SQLGraph(Mapping):
+    """
+    Read-only view of a dependency graph stored in a database (cf. build)
+
+    Behaves like the dict based dependency graph (class -> list of dependencies),
+    the dependencies of a class are queried on access.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def __getitem__(self, c: str) -> list:
+        row = self.conn.execute("SELECT id FROM classes WHERE name = ?", (c,)).fetchone()
+        if row is None:
+            raise KeyError(c)
+
+        return [
+            d
+            for (d,) in self.conn.execute(
+                "SELECT c.name FROM edges e JOIN classes c ON c.id = e.target"
+                " WHERE e.source = ? ORDER BY e.rowid",
+                row,
+            )
+        ]
+
+    def __iter__(self):
+        for (c,) in self.conn.execute("SELECT name FROM classes ORDER BY id"):
+            yield c
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
+
+    def __contains__(self, c) -> bool:
+        return self.conn.execute("SELECT 1 FROM classes WHERE name = ?", (c,)).fetchone() is not None
+
+    def num_edges(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def build(deps, path: str = DB_PATH, valid=None, batch: int = 100000) -> None:
+    """
+    Streams the refined dependency graph of the given dependencies (e.g. depgraph.iter_deps())
+    into a new database under path
+
+    Equivalent to depgraph.build_streaming, classes are validated with valid
+    (default: depgraph.is_valid). The dependencies are inserted in batches of the given size,
+    the database is written to a temporary file first and replaces path when complete.
+    """
+
+    import depgraph
+
+    valid = valid or depgraph.is_valid
+    tmp = path + ".tmp"
+
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+
+    try:
+        # the database is only used after it is complete
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+
+        classes = []
+        edges = []
+
+        def flush():
+            conn.executemany(
+                "INSERT OR IGNORE INTO staged_classes (name, package) VALUES (?, ?)", classes
+            )
+            conn.executemany("INSERT INTO staged_edges VALUES (?, ?)", edges)
+            classes.clear()
+            edges.clear()
+
+        for (c, d) in deps:
+            valid_c = valid(c)
+            valid_d = valid(d)
+
+            if valid_c:
+                classes.append((c, c.rpartition(".")[0]))
+
+            if valid_d:
+                classes.append((d, d.rpartition(".")[0]))
+
+            if valid_c and valid_d:
+                edges.append((c, d))
+
+            if len(classes) >= batch:
+                flush()
+
+        flush()
+
+        # intern the names of the packages and classes and resolve the edges
+        conn.executescript(
+            """
+            INSERT INTO packages (name)
+                SELECT package FROM staged_classes GROUP BY package ORDER BY MIN(id);
+            INSERT INTO classes (id, name, package)
+                SELECT s.id, s.name, p.id FROM staged_classes s JOIN packages p ON p.name = s.package
+                ORDER BY s.id;
+            INSERT INTO edges (source, target)
+                SELECT s.id, t.id FROM staged_edges e
+                JOIN classes s ON s.name = e.source
+                JOIN classes t ON t.name = e.target
+                ORDER BY e.rowid;
+            DROP TABLE staged_classes;
+            DROP TABLE staged_edges;
+            """
+        )
+        conn.executescript(INDEXES)
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp, path)
+
+
+def build_from_dotfile(path: str = DOTFILE_PATH, valid=None, db_path: str = DB_PATH) -> SQLGraph:
+    """
+    Builds the refined dependency graph for a project from dot file into the database
+    (default: the configured dot file and validation, cf. depgraph.is_valid)
+
+    The binary graph and the JSON export of a previous run are removed,
+    so that the report uses the dependency graph of the database (cf. graph.load).
+    Returns the dependency graph
+    """
+
+    import depgraph
+    from graph import GRAPH_PATH, JSON_PATH
+
+    build(depgraph.iter_deps(path), db_path, valid)
+
+    for stale in (GRAPH_PATH, JSON_PATH):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    return SQLGraph(db_path)
+
+
+def _packages(conn) -> dict:
+    return dict(conn.execute("SELECT id, name FROM packages ORDER BY id"))
+
+
+def noc(conn) -> dict:
+    """
+    Number of classes of each package (by package id)
+    """
+
+    return dict(conn.execute("SELECT package, COUNT(*) FROM classes GROUP BY package"))
+
+
+def coupling(conn) -> dict:
+    """
+    Calculates Ca, Ce and instability of all packages (cf. measures.coupling)
+
+    Returns a dict mapping each package id to a tuple (Ca, Ce, I)
+    """
+
+    # classes outside a package that depend on a class within the package
+    aff = dict(
+        conn.execute(
+            """
+            SELECT t.package, COUNT(DISTINCT e.source) FROM edges e
+            JOIN classes s ON s.id = e.source
+            JOIN classes t ON t.id = e.target
+            WHERE s.package != t.package
+            GROUP BY t.package
+            """
+        )
+    )
+
+    # classes within a package that depend on a class outside the package
+    eff = dict(
+        conn.execute(
+            """
+            SELECT s.package, COUNT(DISTINCT e.source) FROM edges e
+            JOIN classes s ON s.id = e.source
+            JOIN classes t ON t.id = e.target
+            WHERE s.package != t.package
+            GROUP BY s.package
+            """
+        )
+    )
+
+    results = {}
+
+    for (p,) in conn.execute("SELECT id FROM packages"):
+        a, e = aff.get(p, 0), eff.get(p, 0)
+        results[p] = (a, e, e / (a + e) if a + e > 0 else 0)
+
+    return results
+
+
+def dlm(conn, tree) -> dict:
+    """
+    Calculates the dependency locality measure of all packages (cf. measures.dlm_all)
+    based on the number of distinct dependencies of each package in each other package
+
+    tree is the package tree of all packages (cf. hierarchy.PackageTree).
+    Returns a dict mapping each package id to its DLM
+    """
+
+    names = _packages(conn)
+    results = dict.fromkeys(names, 0)
+
+    rows = conn.execute(
+        """
+        SELECT s.package, t.package, COUNT(DISTINCT e.target) FROM edges e
+        JOIN classes s ON s.id = e.source
+        JOIN classes t ON t.id = e.target
+        GROUP BY s.package, t.package
+        """
+    )
+
+    for p, q, n in rows:
+        results[p] += tree.distance(tree.id(names[p]), tree.id(names[q])) * n
+
+    return results
+
+
+def pdd(conn) -> dict:
+    """
+    Calculates P-DepDegree of all packages (cf. measures.pdd)
+
+    The classes reachable from a package are determined with a recursive query,
+    the visited classes are kept by SQLite (on disk if necessary).
+    Returns a dict mapping each package id to its P-DepDegree
+    """
+
+    total = conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+    results = {}
+
+    for (p,) in conn.execute("SELECT id FROM packages").fetchall():
+        edges = conn.execute(
+            """
+            WITH RECURSIVE reach (id) AS (
+                SELECT id FROM classes WHERE package = ?
+                UNION
+                SELECT e.target FROM edges e JOIN reach r ON e.source = r.id
+            )
+            SELECT COUNT(*) FROM edges e JOIN reach r ON e.source = r.id
+            """,
+            (p,),
+        ).fetchone()[0]
+
+        results[p] = edges / total if total > 0 else 0
+
+    return results
+
+
+def package_matrix(conn):
+    """
+    Returns the number of class dependencies between packages (cf. package_matrix.PackageMatrix),
+    counted with one query
+    """
+
+    from package_matrix import PackageMatrix
+
+    names = _packages(conn)
+    index = {p: i for i, p in enumerate(names)}
+
+    rows = conn.execute(
+        """
+        SELECT s.package, t.package, COUNT(*) FROM edges e
+        JOIN classes s ON s.id = e.source
+        JOIN classes t ON t.id = e.target
+        GROUP BY s.package, t.package
+        ORDER BY s.package, t.package
+        """
+    )
+
+    return PackageMatrix.from_entries(
+        list(names.values()), ((index[p], index[q], n) for p, q, n in rows)
+    )
+
+
+def package_deps(conn, p: int) -> dict:
+    """
+    Returns the dependencies (target ids) of each class (id) of package p
+    """
+
+    deps = {}
+
+    rows = conn.execute(
+        "SELECT c.id, e.target FROM classes c LEFT JOIN edges e ON e.source = c.id"
+        " WHERE c.package = ? ORDER BY c.id, e.rowid",
+        (p,),
+    )
+
+    for c, group in groupby(rows, key=lambda row: row[0]):
+        deps[c] = [d for _, d in group if d is not None]
+
+    return deps
+
+
+def rollup(conn, tree) -> dict:
+    """
+    Calculates NOC, Ca, Ce and instability for the subtrees of the package hierarchy
+    (cf. measures.rollup), the classes are streamed from the database
+    """
+
+    from measures import rollup_tree
+
+    names = _packages(conn)
+    node = {p: tree.id(name) for p, name in names.items()}
+
+    rows = conn.execute(
+        """
+        SELECT c.id, c.package, t.package FROM classes c
+        JOIN edges e ON e.source = c.id
+        JOIN classes t ON t.id = e.target
+        ORDER BY c.id
+        """
+    )
+
+    def class_targets():
+        for _, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            yield node[group[0][1]], {node[q] for _, _, q in group}
+
+    nocs = {node[p]: n for p, n in noc(conn).items()}
+
+    return rollup_tree(tree, nocs, class_targets())
+
+
+def calc(
+    vectorized: bool = True,
+    path: str = DB_PATH,
+    timings: dict = None,
+    approximate=None,
+) -> dict:
+    """
+    Calculates all defined measures for all packages based on the dependency graph in the database
+
+    NOC, Ca, Ce, DLM and P-DepDegree are calculated with queries, the dependency cohesion measures
+    package by package (cf. measures._package_measures, vectorized, timings and approximate
+    as in measures.calc). The values and the package dependency matrix are stored under ./data
+    like measures.calc.
+    Returns the measurement values
+    """
+
+    import measures
+    from hierarchy import PackageTree
+    from instrument import timed
+
+    if vectorized:
+        try:
+            import numpy, scipy
+        except ImportError:
+            vectorized = False
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    try:
+        names = _packages(conn)
+        tree = PackageTree(names.values())
+
+        cpl = timed(timings, "coupling", coupling, conn)
+        pdds = timed(timings, "p-depdegree", pdd, conn)
+        dlms = timed(timings, "dlm", dlm, conn, tree)
+
+        results = defaultdict(dict)
+
+        for p, name in names.items():
+            deps = package_deps(conn, p)
+            n, lcom3, sim, cc, approximated = measures._package_measures(
+                [set(d) for d in deps.values()], vectorized, timings, approximate
+            )
+
+            results["noc"][name] = n
+            results["ca"][name], results["ce"][name], results["instability"][name] = cpl[p]
+            results["dcm_lcom3"][name] = lcom3
+            results["dcm_sim"][name] = sim
+            results["dcm_cc"][name] = cc
+            results["approximated"][name] = approximated
+            results["p-depdegree"][name] = pdds[p]
+            results["dlm"][name] = dlms[p]
+
+        measures.store(results)
+        measures.store_rollup(timed(timings, "rollup", rollup, conn, tree))
+        timed(timings, "package_matrix", package_matrix, conn).save()
+    finally:
+        conn.close()
+
+    # not calculated by this backend, the report must not show those of a previous run
+    import class_measures
+    from cycles import CYCLES_PATH
+
+    if os.path.exists(CYCLES_PATH):
+        os.remove(CYCLES_PATH)
+
+    class_measures.clear()
+
+    return results
+
+
+if __name__ == "__main__":
+    build_from_dotfile()
+    calc()
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+import batch
+import benchmark
+
+
+def test_batch(tmp_path):
+    benchmark.generate_dotfile(str(tmp_path / "a.jar.dot"), classes=200, seed=1)
+    benchmark.generate_dotfile(str(tmp_path / "b.jar.dot"), classes=300, seed=2)
+
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            [
+                {"name": "a", "domain": benchmark.DOMAIN, "dotfile": "a.jar.dot"},
+                {
+                    "domain": benchmark.DOMAIN,
+                    "dotfile": "b.jar.dot",
+                    "denylist": [f"{benchmark.DOMAIN}.p1."],
+                },
+                {"name": "missing", "domain": "x", "dotfile": "missing.dot"},
+            ]
+        )
+    )
+
+    output = str(tmp_path / "batch")
+    summaries = batch.run(batch.load_manifest(str(manifest)), output, workers=2, plots=False)
+
+    assert [s["name"] for s in summaries] == ["a", benchmark.DOMAIN, "missing"]
+    assert summaries[0]["classes"] > 0
+    assert os.path.exists(summaries[1]["report"])
+    assert os.path.exists(os.path.join(output, "a", "data", "noc.json"))
+    assert "FileNotFoundError" in summaries[2]["error"]
+
+    with open(os.path.join(output, "summary.json")) as f:
+        assert json.load(f) == summaries
+
+    with open(os.path.join(output, "summary.md")) as f:
+        summary = f.read()
+
+    assert "| 1 | a|" in summary
+    assert "missing: FileNotFoundError" in summary
+
+    # in the calling process, the working directory is not changed
+    cwd = os.getcwd()
+    (single,) = batch.run(batch.load_manifest(str(manifest))[:1], output, workers=1, plots=False)
+    assert os.getcwd() == cwd
+    assert single["report"].startswith(os.path.join(output, "a", "reports"))
+
+
+def test_duplicate_names(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            [
+                {"domain": benchmark.DOMAIN, "dotfile": "a.jar.dot"},
+                {"domain": benchmark.DOMAIN, "dotfile": "b.jar.dot"},
+            ]
+        )
+    )
+
+    with pytest.raises(ValueError, match="duplicate"):
+        batch.load_manifest(str(manifest))
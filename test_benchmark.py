@@ -0,0 +1,33 @@
+import benchmark
+import depgraph
+import scc
+
+
+def test_generate_dotfile(tmp_path):
+    path = str(tmp_path / "bench.jar.dot")
+
+    benchmark.generate_dotfile(path, classes=500, depth=3, fanout=4, cycles=0, seed=1)
+    dg = depgraph.build_streaming(
+        depgraph.iter_deps(path), depgraph.validator(benchmark.DOMAIN, [])
+    )
+
+    assert 400 < len(dg) <= 500
+    assert all(c.count(".") - 1 <= 3 + 1 for c in dg)
+
+    # without backward dependencies, the only cycles are self-dependencies
+    _, members = scc.components(dg)
+    assert all(len(m) == 1 for m in members)
+
+    benchmark.generate_dotfile(path, classes=500, depth=3, fanout=4, cycles=0.2, seed=1)
+    dg = depgraph.build_streaming(depgraph.iter_deps(path))
+
+    _, members = scc.components(dg)
+    assert any(len(m) > 1 for m in members)
+
+
+def test_run():
+    result = benchmark.run(300, memory=True, report=True)
+
+    assert result["graph"]["classes"] > 0
+    assert {"depgraph.parse", "measures.pdd_all", "cycles.calc", "report.generate"} <= result["stages"].keys()
+    assert all("peak_memory" in s for s in result["stages"].values())
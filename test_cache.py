@@ -0,0 +1,35 @@
+from cache import Cache, file_hash, key
+
+
+def test_cache(tmp_path):
+    path = str(tmp_path / "cache.json")
+    output = tmp_path / "out.txt"
+    calls = []
+
+    def stage():
+        calls.append(1)
+        output.write_text("x")
+        return [str(output), len(calls)]
+
+    assert Cache(path).run("s", key("a", 1), [str(output)], stage) == [str(output), 1]
+
+    # unchanged inputs
+    cache = Cache(path)
+    assert cache.run("s", key("a", 1), [str(output)], stage) == [str(output), 1]
+    assert cache.hits == {"s"}
+    assert len(calls) == 1
+
+    # changed inputs
+    assert Cache(path).run("s", key("a", 2), lambda r: [r[0]], stage) == [str(output), 2]
+
+    # missing output
+    output.unlink()
+    assert Cache(path).run("s", key("a", 2), [str(output)], stage) == [str(output), 3]
+
+
+def test_file_hash(tmp_path):
+    f = tmp_path / "f"
+    f.write_text("abc")
+
+    assert file_hash(str(f)) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+    assert file_hash(str(tmp_path / "missing")) == ""
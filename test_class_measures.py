@@ -0,0 +1,79 @@
+import random
+
+import class_measures
+
+
+def closure(depgraph, c):
+    seen = set()
+    fringe = [c]
+
+    while fringe:
+        for d in depgraph[fringe.pop()]:
+            if d not in seen:
+                seen.add(d)
+                fringe.append(d)
+
+    seen.discard(c)
+    return seen
+
+
+def random_graph(n, fanout, seed):
+    rnd = random.Random(seed)
+    return {
+        f"c{i}": [f"c{rnd.randrange(n)}" for _ in range(rnd.randint(0, fanout))] for i in range(n)
+    }
+
+
+def test_calc():
+    dg = {
+        "a": ["b", "b", "a"],
+        "b": ["c"],
+        "c": ["b", "d"],
+        "d": [],
+        "e": ["a"],
+    }
+
+    assert class_measures.calc(dg) == {
+        "a": (1, 1, 3, 1),
+        "b": (2, 1, 2, 3),
+        "c": (1, 2, 2, 3),
+        "d": (1, 0, 0, 4),
+        "e": (0, 1, 4, 0),
+    }
+
+
+def test_closure_sizes():
+    dg = random_graph(150, 3, seed=1)
+    dependencies, dependents = class_measures.closure_sizes(dg)
+
+    for c in dg:
+        assert dependencies[c] == len(closure(dg, c))
+        assert dependents[c] == len([d for d in dg if d != c and c in closure(dg, d)])
+
+
+def test_sketch():
+    # a layered graph (no cycles) with large closures
+    dg = {f"c{i}": [f"c{j}" for j in range(max(0, i - 3), i)] for i in range(3000)}
+
+    exact = class_measures.closure_sizes(dg)
+    sketch = class_measures.closure_sizes(dg, sketch=True, precision=10)
+
+    for e, s in zip(exact, sketch):
+        for c in dg:
+            assert abs(s[c] - e[c]) <= 0.15 * e[c] + 3
+
+
+def test_clear(tmp_path, monkeypatch):
+    import measures
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    dg = {"a.A": ["b.B"], "b.B": ["a.A"]}
+
+    measures.calc(False, dg)
+    assert (tmp_path / class_measures.CLASSES_PATH).exists()
+
+    # not calculated, so the values of the previous run are removed
+    measures.calc(False, dg, class_level=False)
+    assert not (tmp_path / class_measures.CLASSES_PATH).exists()
@@ -0,0 +1,59 @@
+import random
+
+from cycles import breaking_edges, calc, package_graph
+from scc import components
+
+
+def test_package_graph():
+    dg = {
+        "a.A": ["a.B", "b.A", "b.B"],
+        "a.B": ["b.A"],
+        "b.A": ["a.A", "b.B"],
+        "b.B": [],
+    }
+
+    assert package_graph(dg) == {"a": {"b": 3}, "b": {"a": 1}}
+
+
+def test_calc():
+    dg = {
+        "a.A": ["b.A"],
+        "b.A": ["b.B"],
+        "b.B": ["a.A"],
+        "b.C": ["c.A"],
+        "c.A": ["b.C", "d.A"],
+        "d.A": [],
+    }
+
+    cycles = calc(dg)
+
+    assert cycles.classes == [["a.A", "b.A", "b.B"], ["b.C", "c.A"]]
+    assert cycles.packages == [["a", "b", "c"]]
+    assert cycles.size == {"a": (3, 1), "b": (3, 3), "c": (3, 1), "d": (0, 0)}
+
+    # a <-> b and b <-> c are broken by removing one dependency each
+    (breaking,) = cycles.breaking
+    assert len(breaking) == 2
+
+
+def test_breaking_edges():
+    random.seed(0)
+    nodes = [f"p{i}" for i in range(40)]
+    graph = {
+        p: {q: random.randint(1, 5) for q in random.sample(nodes, 4) if q != p} for p in nodes
+    }
+
+    (component,) = [m for m in components(graph)[1] if len(m) > 1]
+    breaking = breaking_edges(graph, component)
+
+    def cyclic(removed):
+        g = {p: [q for q in graph[p] if (p, q) not in removed] for p in component}
+        return any(len(m) > 1 for m in components(g)[1])
+
+    removed = {(p, q) for p, q, _ in breaking}
+    assert not cyclic(removed)
+
+    # each of the edges is necessary
+    assert all(cyclic(removed - {e}) for e in removed)
+    assert [n for *_, n in breaking] == sorted((n for *_, n in breaking), reverse=True)
+    assert all(graph[p][q] == n for p, q, n in breaking)
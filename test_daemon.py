@@ -0,0 +1,93 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+import benchmark
+import daemon
+import pipeline
+
+
+@pytest.fixture
+def session(tmp_path):
+    path = str(tmp_path / "bench.jar.dot")
+    benchmark.generate_dotfile(path, classes=300, seed=1)
+
+    session = daemon.Session(path, benchmark.DOMAIN, [])
+    session.refresh()
+
+    return session
+
+
+def test_refresh(session, tmp_path):
+    assert not session.refresh()
+
+    # append a dependency between two existing classes
+    c, d = list(session.depgraph)[:2]
+    with open(session.dotfile) as f:
+        lines = f.readlines()
+    lines.insert(-1, f'   "{c}" -> "{d}";\n')
+    with open(session.dotfile, "w") as f:
+        f.writelines(lines)
+
+    assert session.refresh()
+    assert session.affected
+
+    expected = pipeline.calculate(pipeline.build_graph(session.dotfile, benchmark.DOMAIN, [])).values
+    assert session.values == expected
+
+
+def test_http(session):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), daemon.handler(session))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(path):
+        with urlopen(f"http://127.0.0.1:{server.server_port}{path}") as response:
+            return json.load(response)
+
+    try:
+        p = get("/packages")[0]
+
+        assert get("/status")["classes"] == len(session.depgraph)
+        assert get(f"/packages/{p}") == session.package(p)
+        assert get(f"/packages/{p}/dependents") == session.matrix.dependents(p)
+        assert "dlm" in get("/measures")
+
+        ranked = get("/measures/noc?top=3")
+        assert [v for _, v in ranked] == sorted(session.values["noc"].values(), reverse=True)[:3]
+        assert get("/measures/noc?asc")[0][1] == min(session.values["noc"].values())
+
+        with pytest.raises(HTTPError) as e:
+            get("/packages/x.y")
+        assert e.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_watch_failing(session, monkeypatch):
+    stop = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        if len(calls) == 1:
+            raise KeyError("x.Y")
+        stop.set()
+        return False
+
+    monkeypatch.setattr(session, "refresh", refresh)
+    daemon.watch(session, 0, stop)
+
+    status = session.status()
+    assert len(calls) == 2
+    assert status["failing"]
+    assert status["error"] == "KeyError: 'x.Y'"
+
+    monkeypatch.undo()
+    session.stamp = None
+    assert session.refresh()
+    assert not session.status()["failing"]
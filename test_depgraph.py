@@ -0,0 +1,85 @@
+import pytest
+
+import depgraph
+
+
+DOTFILE = """digraph "x.jar" {
+    // Path: x.jar
+   "a.b.C"                                            -> "a.b.D";
+   "a.b.C"                                            -> "java.lang.String (java.base)";
+   "a.b.D"                                            -> "a.e.F (x.jar)";
+   "a.b.D"                                            -> "a.b.DTest";
+   "a.b.DTest"                                        -> "a.b.C";
+   "a.e.F"                                            -> "a.x.G";
+   "a.e.F$1"                                          -> "a.b.C (not found)";
+   "a.x.G"                                            -> "a.b.D";
+   node [shape=box];
+   // comment
+   "a.e.H"                                            -> "java.util.List";
+}
+"""
+
+
+@pytest.fixture
+def dotfile(tmp_path, monkeypatch):
+    monkeypatch.setattr(depgraph, "is_valid", depgraph.validator("a", ["a.x."]))
+
+    path = tmp_path / "x.jar.dot"
+    path.write_text(DOTFILE)
+
+    return str(path)
+
+
+def test_iter_deps(dotfile):
+    deps = list(depgraph.iter_deps(dotfile))
+
+    assert len(deps) == 9
+    assert deps[1] == ("a.b.C", "java.lang.String")
+    assert deps[2] == ("a.b.D", "a.e.F")
+
+
+def test_build_streaming(dotfile):
+    deps = list(depgraph.iter_deps(dotfile))
+    expected = depgraph.build(depgraph.get_classes(deps), depgraph.refine_deps(deps))
+
+    dg = depgraph.build_streaming(depgraph.iter_deps(dotfile))
+
+    assert dg == {
+        "a.b.C": ["a.b.D"],
+        "a.b.D": ["a.e.F"],
+        "a.e.F": [],
+        "a.e.F$1": ["a.b.C"],
+        "a.e.H": [],
+    }
+    assert list(dg.items()) == list(expected.items())
+
+
+def test_validator():
+    denylist = ["a.b.c.", "a.b.d.E", "a.b.c.x.", "a.f", "b."]
+    is_valid = depgraph.validator("a.", denylist)
+
+    for c in [
+        "a.b.c.D",
+        "a.b.c.x.Y",
+        "a.b.d.E",
+        "a.b.d.E$1",
+        "a.b.d.F",
+        "a.b.C",
+        "a.f.G",
+        "a.foo.H",
+        "a.g.I",
+        "a.g.ITest",
+        "a.g.package-info",
+        "b.C",
+    ]:
+        expected = (
+            c.startswith("a.")
+            and not c.endswith("Test")
+            and not c.endswith("package-info")
+            and not any(c.startswith(p) for p in denylist)
+        )
+
+        assert is_valid(c) == expected
+
+    assert depgraph._prefix_pattern(["a.b.", "a.c."]) == r"a\.(?:b\.|c\.)"
+    assert depgraph._prefix_pattern(["a.b.c", "a.b"]) == r"a\.b"
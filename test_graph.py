@@ -0,0 +1,90 @@
+import pytest
+
+from graph import Graph
+from measures import (
+    group_by_package,
+    ca,
+    ce,
+    coupling,
+    dcm_lcom3,
+    pdd,
+    pdd_all,
+    dlm,
+)
+
+
+DG = {
+    "a.A": ["a.B", "b.C", "b.c.D"],
+    "a.B": ["a.A", "b.C"],
+    "b.C": ["b.c.D", "b.c.E"],
+    "b.c.D": ["b.c.E"],
+    "b.c.E": [],
+    "b.c.F": ["a.A", "b.c.F"],
+}
+
+
+def test_graph():
+    g = Graph.from_dict(DG)
+
+    assert len(g) == len(DG)
+    assert list(g) == list(DG)
+    assert g.to_dict() == DG
+    assert g.num_edges() == 10
+    assert "b.C" in g and "x.Y" not in g
+    assert list(g.successors(g.id("b.C"))) == [g.id("b.c.D"), g.id("b.c.E")]
+    assert [g.packages[g.pkg_of[g.id(c)]] for c in DG] == ["a", "a", "b", "b.c", "b.c", "b.c"]
+    assert g.group_by_package() == group_by_package(DG)
+
+    with pytest.raises(KeyError):
+        g["x.Y"]
+
+
+def test_graph_missing_classes():
+    g = Graph.from_dict({"a.A": ["a.B"]})
+
+    assert g.to_dict() == {"a.A": ["a.B"], "a.B": []}
+
+
+def test_measures_on_graph():
+    g = Graph.from_dict(DG)
+    packages = group_by_package(g)
+
+    assert coupling(packages, g) == coupling(packages, DG)
+    assert pdd_all(packages, g) == pdd_all(packages, DG)
+
+    for p, pkg_classes in packages.items():
+        assert ca(pkg_classes, g) == ca(pkg_classes, DG)
+        assert ce(pkg_classes, g) == ce(pkg_classes, DG)
+        assert pdd(pkg_classes, g) == pdd(pkg_classes, DG)
+        assert dcm_lcom3([set(g[c]) for c in pkg_classes]) == dcm_lcom3(
+            [set(DG[c]) for c in pkg_classes]
+        )
+        assert dlm(p, set().union(*[g[c] for c in pkg_classes])) == dlm(
+            p, set().union(*[DG[c] for c in pkg_classes])
+        )
+
+
+def test_save_load(tmp_path):
+    path = str(tmp_path / "depgraph.bin")
+
+    g = Graph.from_dict(DG)
+    g.save(path)
+
+    loaded = Graph.load(path)
+
+    assert loaded.to_dict() == DG
+    assert loaded.classes == g.classes
+    assert loaded.packages == g.packages
+    assert list(loaded.pkg_of) == list(g.pkg_of)
+    assert list(loaded.successors(loaded.id("a.A"))) == list(g.successors(g.id("a.A")))
+
+    Graph.from_dict({}).save(path)
+    assert Graph.load(path).to_dict() == {}
+
+
+def test_load_invalid(tmp_path):
+    path = tmp_path / "depgraph.bin"
+    path.write_bytes(b"\0" * 64)
+
+    with pytest.raises(ValueError):
+        Graph.load(str(path))
@@ -0,0 +1,28 @@
+import random
+
+from hierarchy import PackageTree
+from measures import _dist
+
+
+def test_package_tree():
+    tree = PackageTree(["a.b.c", "a.d", "e"])
+
+    assert len(tree) == 6
+    assert "a.b" in tree
+    assert tree.depth[tree.id("a.b.c")] == 3
+    assert tree.parent[tree.id("a.b")] == tree.id("a")
+    assert tree.lca(tree.id("a.b.c"), tree.id("a.d")) == tree.id("a")
+    assert tree.lca(tree.id("a.b.c"), tree.id("e")) == tree.id("")
+    assert tree.lca(tree.id("a.b"), tree.id("a.b.c")) == tree.id("a.b")
+
+
+def test_distance():
+    rnd = random.Random(0)
+    packages = [
+        ".".join(f"p{rnd.randrange(3)}" for _ in range(rnd.randint(1, 6))) for _ in range(200)
+    ]
+    tree = PackageTree(packages)
+
+    for _ in range(1000):
+        a, b = rnd.choice(packages), rnd.choice(packages)
+        assert tree.distance(tree.id(a), tree.id(b)) == _dist(a, b)
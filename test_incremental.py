@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+import incremental
+import measures
+from graph import Graph, GRAPH_PATH
+
+
+OLD = {
+    "a.A": ["a.B", "b.C"],
+    "a.B": ["b.C"],
+    "b.C": ["b.D"],
+    "b.D": [],
+    "c.E": ["c.F"],
+    "c.F": ["c.E"],
+    "d.G": ["d.H"],
+    "d.H": [],
+    "e.I": [],
+}
+
+NEW = {
+    "a.A": ["a.B", "b.C"],
+    "a.B": ["b.C"],
+    "b.C": ["b.D", "c.E"],
+    "b.D": [],
+    "c.E": ["c.F"],
+    "c.F": ["c.E"],
+    "d.G": ["d.H"],
+    "d.H": [],
+    "f.J": ["d.G"],
+}
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    Graph.from_dict(OLD).save(GRAPH_PATH)
+    measures.calc(depgraph=OLD)
+
+
+def load_results():
+    results = {}
+    for m in measures.MEASURES:
+        with open(f"./data/{m}.json") as f:
+            results[m] = json.load(f)
+
+    return results
+
+
+def test_affected_packages():
+    changed = incremental.changed_classes(OLD, NEW)
+    assert changed == {"b.C", "e.I", "f.J"}
+
+    direct, transitive = incremental.affected_packages(OLD, NEW, changed)
+    assert direct == {"b", "c", "d", "e", "f"}
+    assert transitive == {"a", "b", "e", "f"}
+
+
+def test_calc(data):
+    old = incremental.previous_graph()
+    assert old.to_dict() == OLD
+
+    Graph.from_dict(NEW).save(GRAPH_PATH)
+    incremental.calc(old)
+    results = load_results()
+
+    measures.calc(depgraph=NEW)
+
+    assert results == load_results()
+    assert "e" not in results["noc"]
+
+
+def test_previous_graph_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert incremental.previous_graph() is None
+
+
+def test_settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    exact = incremental.settings_key(True)
+    approximated = incremental.settings_key(True, measures.Approximation(100, 0.05, 0))
+
+    assert exact != approximated
+    assert not incremental.same_settings(exact)
+
+    incremental.store_settings(exact)
+    assert incremental.same_settings(exact)
+    assert not incremental.same_settings(approximated)
+
+    incremental.store_settings(None)
+    assert not incremental.same_settings(exact)
+
+
+def test_calc_registered(data, monkeypatch):
+    monkeypatch.setattr("measures.MEASURES", dict(measures.MEASURES))
+
+    @measures.measure("nod", "class_deps")
+    def nod(ctx, class_deps):
+        return {p: sum(len(class_deps[c]) for c in ctx.packages[p]) for p in ctx.packages}
+
+    # values of a measure registered after the previous run are missing
+    assert incremental.previous_graph() is None
+
+    measures.calc(depgraph=OLD)
+    old = incremental.previous_graph()
+
+    Graph.from_dict(NEW).save(GRAPH_PATH)
+    incremental.calc(old)
+    results = load_results()
+
+    measures.calc(depgraph=NEW)
+
+    assert results == load_results()
+    assert results["nod"]["b"] == 2
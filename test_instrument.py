@@ -0,0 +1,43 @@
+import json
+
+from instrument import Metrics, merge, timed
+
+
+def test_timed():
+    timings = {}
+
+    assert timed(timings, "sum", sum, [1, 2]) == 3
+    assert timed(timings, "sum", sum, [3]) == 3
+    assert timed(None, "sum", sum, [4]) == 4
+
+    assert timings["sum"][2] == 2
+
+    merge(timings, {"sum": [1.0, 1.0, 1, 0], "max": [0.5, 0.5, 1, 0]})
+    assert timings["sum"][2] == 3
+    assert timings["max"] == [0.5, 0.5, 1, 0]
+
+    timed(timings, "noc", dict.fromkeys, "ab")
+    assert timings["noc"][2:] == [1, 2]
+
+
+def test_metrics(tmp_path):
+    metrics = Metrics(trace_memory=True)
+
+    with metrics.stage("build") as stage:
+        stage["items"] = len([0] * 1000)
+
+    timed(metrics.measures, "noc", len, [1])
+
+    path = str(tmp_path / "metrics.json")
+    metrics.dump(path)
+
+    with open(path) as f:
+        data = json.load(f)
+
+    assert data["stages"]["build"]["items"] == 1000
+    assert {"wall", "cpu", "process_peak_rss", "peak_rss_growth", "peak_traced"} <= data[
+        "stages"
+    ]["build"].keys()
+    assert data["stages"]["build"]["peak_rss_growth"] >= 0
+    assert data["measures"]["noc"]["calls"] == 1
+    assert data["measures"]["noc"]["items"] == 0
@@ -1,16 +1,29 @@
 import pytest
 
 from measures import (
+    calc_packages,
     group_by_package,
     noc,
     ca,
     ce,
     instability,
+    coupling,
     dcm_lcom3,
     dcm_sim,
     dcm_cc,
+    dcm_matrix,
+    dcm_approx,
+    Approximation,
+    ARTIFACTS,
+    MEASURES,
+    artifact,
+    measure,
     pdd,
+    pdd_all,
     dlm,
+    dlm_all,
+    rollup,
+    _dist,
 )
 
 
@@ -104,6 +117,35 @@ def test_cpl():
     assert instability(classes6, dg2) == 2 / (2 + 5)
 
 
+def test_coupling():
+    dg = {
+        "a": ["b", "c", "d"],
+        "b": ["a", "c", "d"],
+        "c": ["e", "f"],
+        "d": ["f", "g"],
+        "e": ["a", "b", "g"],
+        "f": ["a", "h"],
+        "g": ["f"],
+        "h": ["i", "j", "d"],
+        "i": ["j", "h"],
+        "j": ["g", "h"],
+    }
+
+    packages = {
+        "p": ["a", "d", "i"],
+        "q": ["b", "c", "e"],
+        "r": ["f", "g", "h", "j"],
+    }
+
+    cpl = coupling(packages, dg)
+
+    for p, pkg_classes in packages.items():
+        assert cpl[p] == (
+            ca(pkg_classes, dg),
+            ce(pkg_classes, dg),
+            instability(pkg_classes, dg),
+        )
+
 
 def test_dcm():
     pkg1 = [{"a", "b", "c"}]
@@ -157,6 +199,12 @@ def test_dcm():
     assert dcm_sim(pkg5) == (2 / 3 + 1 / 5 + 1 / 4 + 1 / 4) / 10
     assert dcm_cc(pkg5) == (2 + 2 + 3 + 1 + 1 + 1 + 1) / (5 * 7)
 
+    for pkg in (pkg1, pkg2, pkg3, pkg4, pkg5):
+        assert dcm_matrix(pkg) == (dcm_lcom3(pkg), dcm_sim(pkg), dcm_cc(pkg))
+        assert dcm_matrix(pkg, chunk=1) == dcm_matrix(pkg)
+
+    assert dcm_matrix([set(), set()]) == (0, 0, 0)
+
 
 def test_pdd():
     dg1 = {
@@ -211,6 +259,48 @@ def test_pdd():
     assert pdd({"h", "i", "j"}, dg2) == 1
 
 
+def test_pdd_all():
+    dg1 = {
+        "a": ["b", "c", "d"],
+        "b": ["c", "d"],
+        "c": ["e", "f"],
+        "d": ["g"],
+        "e": ["g"],
+        "f": ["d"],
+        "g": [],
+        "h": ["i", "j"],
+        "i": ["j"],
+        "j": ["g"],
+    }
+
+    dg2 = {
+        "a": ["b", "c", "d"],
+        "b": ["a", "c", "d"],
+        "c": ["e", "f"],
+        "d": ["f", "g"],
+        "e": ["a", "b", "g"],
+        "f": ["a", "h"],
+        "g": ["f"],
+        "h": ["i", "j", "d"],
+        "i": ["j", "h"],
+        "j": ["g", "h"],
+    }
+
+    packages = {
+        "p": ["a", "b", "c"],
+        "q": ["h", "i"],
+        "r": ["d", "e", "f"],
+        "s": ["j"],
+        "t": ["g"],
+    }
+
+    for dg in (dg1, dg2):
+        pdds = pdd_all(packages, dg)
+
+        for p, pkg_classes in packages.items():
+            assert pdds[p] == pdd(set(pkg_classes), dg)
+
+
 def test_dlm():
     deps = {
         "a.G",
@@ -230,3 +320,147 @@ def test_dlm():
     assert dlm("a.f", deps) == 27
     assert dlm("a.b.c", deps) == 31
     assert dlm("a.b.c.d", deps) == 39
+
+
+def test_dist():
+    assert _dist("a.b.c.d.e", "a.b.f.g.h") == 6
+    assert _dist("a.x.c", "a.y.c") == 4
+    assert _dist("a.b", "c.b") == 4
+
+
+def test_dlm_all():
+    dg = {
+        "a.A": ["a.b.B", "a.x.c.C", "a.y.c.D"],
+        "a.b.B": ["a.x.c.C", "a.b.B"],
+        "a.x.c.C": ["a.y.c.D", "e.E"],
+        "a.y.c.D": [],
+        "e.E": ["a.A"],
+    }
+
+    packages = group_by_package(dg)
+    dlms = dlm_all(packages, dg)
+
+    for p, pkg_classes in packages.items():
+        assert dlms[p] == dlm(p, set().union(*[dg[c] for c in pkg_classes]))
+
+    assert dlms["a.x.c"] == 4 + 4
+
+
+def test_calc_packages_parallel():
+    dg = {
+        "a.A": ["a.B", "b.C", "b.c.D"],
+        "a.B": ["a.A", "b.C"],
+        "b.C": ["b.c.D", "b.c.E"],
+        "b.c.D": ["b.c.E"],
+        "b.c.E": [],
+        "b.c.F": ["a.A", "b.c.F"],
+        "d.G": ["d.H", "a.B"],
+        "d.H": ["d.G"],
+    }
+
+    packages = group_by_package(dg)
+    results = calc_packages(dg, packages)
+
+    assert calc_packages(dg, packages, workers=3) == results
+    assert calc_packages(dg, packages, vectorized=False, workers=2) == results
+    assert calc_packages(dg, packages, selected=["b", "x"]) == {
+        m: {"b": values["b"]} for m, values in results.items()
+    }
+
+
+def test_rollup():
+    dg = {
+        "a.A": ["a.b.B", "a.x.c.C", "a.y.c.D"],
+        "a.b.B": ["a.x.c.C", "a.b.B"],
+        "a.b.E": ["a.b.B"],
+        "a.x.c.C": ["a.y.c.D", "e.E"],
+        "a.x.F": ["a.x.c.C"],
+        "a.y.c.D": [],
+        "e.E": ["a.A", "a.b.E"],
+    }
+
+    packages = group_by_package(dg)
+    values = rollup(packages, dg)
+
+    assert set(values) == {"a", "a.b", "a.x", "a.x.c", "a.y", "a.y.c", "e"}
+
+    for p, v in values.items():
+        subtree = [c for c in dg if c.startswith(p + ".")]
+        aff, eff = ca(subtree, dg), ce(subtree, dg)
+
+        assert v == (len(subtree), aff, eff, eff / (aff + eff) if aff + eff > 0 else 0)
+
+    assert values["a"][:3] == (6, 1, 1)
+
+
+def test_dcm_approx():
+    import random
+
+    rnd = random.Random(0)
+    pkg = [{f"d{rnd.randrange(60)}" for _ in range(rnd.randint(0, 6))} for _ in range(300)]
+    npairs = 300 * 299 // 2
+
+    lcom3, sim, cc = dcm_matrix(pkg)
+    est_lcom3, est_sim, est_cc = dcm_approx(pkg, epsilon=0.02, seed=1)
+
+    assert est_cc == cc
+    assert abs(est_sim - sim) <= 0.02
+    assert abs(est_lcom3 - lcom3) <= 0.02 * npairs
+    assert dcm_approx(pkg, epsilon=0.02, seed=1) == (est_lcom3, est_sim, est_cc)
+
+    assert dcm_approx([set(), set()]) == (0, 0.0, 0)
+    assert dcm_approx([{"a"}]) == (0, 0, 1)
+
+
+def test_calc_packages_approximated():
+    dg = {f"a.C{i}": [f"b.D{i % 7}", f"b.D{i % 5}"] for i in range(40)}
+    dg.update({f"b.D{i}": [f"a.C{i}"] for i in range(7)})
+
+    packages = group_by_package(dg)
+    exact = calc_packages(dg, packages)
+    results = calc_packages(dg, packages, approximate=Approximation(10, 0.05, 0))
+
+    assert results["approximated"] == {"a": True, "b": False}
+    assert exact["approximated"] == {"a": False, "b": False}
+    assert results["dcm_sim"]["b"] == exact["dcm_sim"]["b"]
+    assert abs(results["dcm_sim"]["a"] - exact["dcm_sim"]["a"]) <= 0.05
+    assert calc_packages(dg, packages, workers=2, approximate=Approximation(10, 0.05, 0)) == results
+
+
+def test_registry(monkeypatch):
+    monkeypatch.setattr("measures.ARTIFACTS", dict(ARTIFACTS))
+    monkeypatch.setattr("measures.MEASURES", dict(MEASURES))
+
+    import measures
+
+    calls = []
+
+    @artifact("num_deps", "class_deps")
+    def num_deps(ctx, class_deps):
+        calls.append(1)
+        return {c: len(deps) for c, deps in class_deps.items()}
+
+    @measure("nod", "num_deps")
+    def nod(ctx, num_deps):
+        return {p: sum(num_deps[c] for c in ctx.packages[p]) for p in ctx.packages}
+
+    @measure("max_deps", "num_deps", "noc")
+    def max_deps(ctx, num_deps, nocs):
+        return {p: max(num_deps[c] for c in ctx.packages[p]) if nocs[p] else 0 for p in ctx.packages}
+
+    dg = {"a.A": ["a.B", "b.C"], "a.B": ["b.C"], "b.C": []}
+    packages = group_by_package(dg)
+    timings = {}
+
+    results = calc_packages(dg, packages, timings=timings)
+
+    assert results["nod"] == {"a": 3, "b": 0}
+    assert results["max_deps"] == {"a": 2, "b": 0}
+    assert len(calls) == 1
+    assert timings["class_deps"][2] == 1
+    assert "nod" in measures.MEASURES
+
+    assert calc_packages(dg, packages, names=["ce", "instability"]) == {
+        "ce": {"a": 2, "b": 0},
+        "instability": {"a": 1.0, "b": 0},
+    }
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from cycles import package_graph
+from graph import Graph
+from package_matrix import PackageMatrix
+
+DG = {
+    "a.A": ["a.B", "b.A", "b.B"],
+    "a.B": ["b.A", "c.A"],
+    "b.A": ["a.A", "b.B"],
+    "b.B": [],
+}
+
+
+def test_build():
+    m = PackageMatrix.build(DG)
+
+    # c.A is only known as a dependency
+    assert m.packages == ["a", "b", "c"]
+    assert m.dependencies("a") == {"b": 3, "c": 1}
+    assert m.dependents("a") == {"b": 1}
+    assert m.dependents("c") == {"a": 1}
+    assert m.weight("a", "a") == 1
+    assert m.weight("b", "c") == 0
+    assert m.coupling("a") == (1, 4)
+
+
+def test_build_graph():
+    random.seed(0)
+    dg = {f"p{random.randrange(20)}.C{i}": [] for i in range(500)}
+    classes = list(dg)
+    for c in classes:
+        dg[c] = random.sample(classes, 4)
+
+    m = PackageMatrix.build(Graph.from_dict(dg))
+
+    assert m.to_dict() == package_graph(dg)
+    for p in m.packages:
+        assert m.dependents(p) == {q: deps[p] for q, deps in package_graph(dg).items() if p in deps}
+
+
+@pytest.mark.parametrize("name", ["package_matrix.npz", "package_matrix.json"])
+def test_save_load(tmp_path, name):
+    pytest.importorskip("numpy")
+
+    m = PackageMatrix.build(DG)
+    loaded = PackageMatrix.load(m.save(str(tmp_path / name)))
+
+    assert loaded.packages == m.packages
+    assert loaded.to_dict() == m.to_dict()
+    assert loaded.dependents("a") == m.dependents("a")
+
+
+def test_artifact():
+    import measures
+
+    dg = dict(DG, **{"c.A": []})
+    values = measures.calc_packages(
+        dg, measures.group_by_package(dg), vectorized=False, names=["noc", "package_matrix"]
+    )
+
+    assert values["package_matrix"].to_dict() == PackageMatrix.build(dg).to_dict()
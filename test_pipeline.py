@@ -0,0 +1,74 @@
+import json
+import os
+
+import benchmark
+import depgraph
+import measures
+import pipeline
+
+
+def test_pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for folder in ("data", "reports"):
+        (tmp_path / folder).mkdir()
+
+    benchmark.generate_dotfile("bench.jar.dot", classes=400, seed=4)
+
+    g, results, path = pipeline.run("bench.jar.dot", benchmark.DOMAIN, [], plots=False)
+
+    # nothing but the report is written
+    assert os.listdir("data") == []
+    assert os.path.exists(path)
+
+    pipeline.store_graph(g)
+    pipeline.store_results(results)
+
+    with open("./data/rollup.json") as f:
+        stored_rollup = json.load(f)
+
+    valid = depgraph.validator(benchmark.DOMAIN, [])
+    assert dict(g) == depgraph.build_from_dotfile(False, "bench.jar.dot", valid)
+    assert results.values == measures.calc()
+
+    with open("./data/rollup.json") as f:
+        assert json.load(f) == stored_rollup
+
+    with open(path) as f:
+        report = f.read()
+
+    assert report.count("|") > 0
+    assert "### Package Hierarchy" in report
+
+
+def test_pipeline_output(tmp_path, monkeypatch):
+    # no folders are created beforehand
+    monkeypatch.chdir(tmp_path)
+    benchmark.generate_dotfile("bench.jar.dot", classes=200, seed=5)
+
+    _, _, path = pipeline.run("bench.jar.dot", benchmark.DOMAIN, [], plots=False)
+    assert os.path.exists(path)
+
+    output = str(tmp_path / "out")
+    _, _, path = pipeline.run(
+        "bench.jar.dot", benchmark.DOMAIN, [], plots=False, store=True, output=output
+    )
+
+    assert path.startswith(os.path.join(output, "reports"))
+    assert os.path.exists(os.path.join(output, "data", "noc.json"))
+    assert os.path.exists(os.path.join(output, "data", "depgraph.bin"))
+
+
+def test_calculate_condenses_once(monkeypatch):
+    import cycles
+    import scc
+
+    calls = []
+    condense = scc.condense
+    monkeypatch.setattr(scc, "condense", lambda g: calls.append(1) or condense(g))
+
+    dg = {"a.A": ["b.B"], "b.B": ["a.A", "c.C"], "c.C": []}
+    results = pipeline.calculate(dg, vectorized=False)
+
+    assert len(calls) == 1
+    assert results.cycles == cycles.calc(dg)
+    assert results.values["p-depdegree"] == measures.pdd_all(measures.group_by_package(dg), dg)
@@ -0,0 +1,51 @@
+from scc import components, condense, reachability, reached_weight
+
+
+def test_components():
+    dg = {
+        "a": ["b"],
+        "b": ["c"],
+        "c": ["a", "d"],
+        "d": ["e"],
+        "e": ["d"],
+        "f": ["a", "f"],
+    }
+
+    comp_of, members = components(dg)
+
+    assert sorted(sorted(m) for m in members) == [["a", "b", "c"], ["d", "e"], ["f"]]
+
+    # successors have smaller component ids
+    for c, deps in dg.items():
+        for d in deps:
+            assert comp_of[d] <= comp_of[c]
+
+
+def test_components_deep_chain():
+    # deeper than the recursion limit
+    n = 50000
+    dg = {f"c{i}": [f"c{i + 1}"] for i in range(n)}
+    dg[f"c{n}"] = ["c0"]
+
+    _, members = components(dg)
+
+    assert len(members) == 1
+    assert len(members[0]) == n + 1
+
+
+def test_reachability():
+    dg = {
+        "a": ["b", "c"],
+        "b": ["c", "c"],
+        "c": [],
+        "d": ["a"],
+    }
+
+    cond = condense(dg)
+    reach = reachability(cond)
+
+    assert sum(cond.weight) == 5
+    assert reached_weight(reach[cond.comp_of["a"]], cond.weight) == 4
+    assert reached_weight(reach[cond.comp_of["b"]], cond.weight) == 2
+    assert reached_weight(reach[cond.comp_of["c"]], cond.weight) == 0
+    assert reached_weight(reach[cond.comp_of["d"]], cond.weight) == 5
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import benchmark
+import depgraph
+import graph
+import measures
+import report
+import sqlstore
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for folder in ("data", "reports"):
+        (tmp_path / folder).mkdir()
+
+    benchmark.generate_dotfile("bench.jar.dot", classes=500, seed=3)
+
+    return depgraph.validator(benchmark.DOMAIN, [])
+
+
+def test_sql_graph(project):
+    dg = depgraph.build_streaming(depgraph.iter_deps("bench.jar.dot"), project)
+    g = sqlstore.build_from_dotfile("bench.jar.dot", project)
+
+    assert len(g) == len(dg)
+    assert list(g) == list(dg)
+    assert dict(g.items()) == dg
+    assert g.num_edges() == sum(len(deps) for deps in dg.values())
+    assert "x.Y" not in g
+
+    with pytest.raises(KeyError):
+        g["x.Y"]
+
+    assert isinstance(graph.load(), sqlstore.SQLGraph)
+
+
+def test_calc(project):
+    depgraph.build_from_dotfile(False, "bench.jar.dot", project)
+    expected = measures.calc()
+    with open("./data/rollup.json") as f:
+        expected_rollup = json.load(f)
+
+    sqlstore.build_from_dotfile("bench.jar.dot", project)
+    results = sqlstore.calc()
+
+    assert results == expected
+    with open("./data/rollup.json") as f:
+        assert json.load(f) == expected_rollup
+
+    # the cycles and class measures of the previous run are not reported
+    report.unload()
+    with open(report.generate(plots=False, domain=benchmark.DOMAIN)) as f:
+        text = f.read()
+        assert "### Dependency Cycles" not in text
+        assert "### Classes" not in text
+    report.unload()